@@ -1,158 +1,134 @@
-from flask import Flask, render_template, request, redirect, session
-from flask_mysqldb import MySQL
+from flask import Flask, render_template, request, redirect, session, jsonify, g
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-import joblib
-from textblob import TextBlob
+import os
+import time
+
+import catalog
+import config
+import database
+import ingest
+import jobs
+import metrics
+from cache import TTLCache
+from registry import ModelRegistry
+from relevance import RelevanceRules
+from scoring import (
+    score_version,
+    score_unscored,
+    apply_scores,
+    fetch_scoring_inputs,
+    fetch_review_page,
+    decode_cursor,
+    REVIEW_PAGE_SIZE,
+    MAX_REVIEW_PAGE_SIZE,
+    record_scores,
+    fetch_product_integrity
+)
+from worker import BackgroundScorer
 
 # =========================================================
-# LOAD ML MODEL
+# ML MODEL (registry.py)
+# the promoted version is loaded lazily on first scoring, so
+# pages served from stored scores (and SCORING_MODE=worker
+# processes) never load it; a newly promoted version is picked
+# up in the background without a restart.
 # =========================================================
 
-bundle = joblib.load("model/review_model.pkl")
+models = ModelRegistry()
 
-model = bundle["model"]
-
-# slightly safer threshold for real reviews
-THRESHOLD = max(bundle["threshold"], 0.50)
-
-FEATURES = bundle["features"]
+# "inline": score new reviews inside the request
+# "worker": only read stored scores and queue the rest for worker.py
+SCORING_MODE = os.environ.get("SCORING_MODE", "inline")
 
 # =========================================================
 # APP SETUP
 # =========================================================
 
 app = Flask(__name__)
-app.secret_key = "dev-secret"
-
-# =========================================================
-# MYSQL CONFIG
-# =========================================================
-
-app.config["MYSQL_HOST"] = "localhost"
-app.config["MYSQL_USER"] = "root"
-app.config["MYSQL_PASSWORD"] = "password"
-app.config["MYSQL_DB"] = "trueinsight"
-
-mysql = MySQL(app)
+app.secret_key = os.environ.get("SECRET_KEY", config.SECRET_KEY)
 
 # =========================================================
-# CATEGORY RELEVANCE CHECK
+# MYSQL (database.py, settings in config.py)
+# mysql.connection is the request's pooled connection
 # =========================================================
 
-def is_review_relevant(review_text, product_category):
-
-    text = review_text.lower()
-    category = product_category.lower()
+mysql = database.FlaskDB(app)
 
-    INVALID_KEYWORDS = {
 
-        "phone": ["spf","skin","rash","irritation","greasy","sole","grip","running","walking"],
+# every query of a request is counted and timed (metrics.py)
+def db_cursor():
 
-        "laptop": ["spf","skin","rash","irritation","greasy","sole","grip","running","walking"],
-
-        "sunscreen": ["camera","battery","display","processor","performance","heating","speaker","charging"],
-
-        "shoes": ["camera","battery","display","processor","performance","heating","speaker","charging"]
-    }
-
-    for word in INVALID_KEYWORDS.get(category, []):
-        if word in text:
-            return False
-
-    return True
+    return metrics.TimedCursor(mysql.connection.cursor())
 
 
 # =========================================================
-# ML REVIEW ANALYSIS
+# REQUEST TIMING (metrics.py, served on /metrics)
+# with DEBUG_TIMING=1 a request sent with "X-Debug-Timing: 1" gets
+# its stage breakdown back in a Server-Timing header (browser dev
+# tools show it in the request's Timing tab); off by default, it
+# tells clients how long the internals take
 # =========================================================
 
-def analyze_reviews(reviews):
+DEBUG_TIMING = os.environ.get("DEBUG_TIMING") == "1"
 
-    if not reviews:
-        return []
 
-    texts = [r["text"].lower().strip() for r in reviews]
+@app.before_request
+def start_request_timer():
 
-    analyzed = []
+    g.request_start = time.perf_counter()
 
-    cur = mysql.connection.cursor()
+    if DEBUG_TIMING and request.headers.get("X-Debug-Timing") == "1":
+        g.trace_token = metrics.start_trace()
 
-    for r in reviews:
 
-        text = r["text"]
-        rating = r["rating"]
-        created_at = r["created_at"]
-        user_id = r["user_id"]
-
-        # -------- FEATURE EXTRACTION --------
-
-        review_length = len(text)
-        word_count = len(text.split())
-        sentiment = TextBlob(text).sentiment.polarity
-
-        cur.execute(
-            "SELECT COUNT(*) FROM reviews WHERE user_id=%s",
-            (user_id,)
-        )
-        user_review_count = cur.fetchone()[0]
+@app.after_request
+def record_request_time(response):
 
-        cur.execute("""
-            SELECT COUNT(*) FROM reviews
-            WHERE user_id=%s AND DATE(created_at)=DATE(%s)
-        """,(user_id,created_at))
+    metrics.REQUEST_SECONDS.observe(
+        time.perf_counter() - g.request_start,
+        request.endpoint or "none",
+        str(response.status_code)
+    )
 
-        daily_review_count = cur.fetchone()[0]
+    if "trace_token" in g:
+        response.headers["Server-Timing"] = metrics.current_trace().server_timing()
 
-        duplicate_flag = 1 if texts.count(text.lower().strip()) > 1 else 0
+    return response
 
-        generic_flag = 1 if text.lower().strip() in [
-            "good","nice","excellent","very good"
-        ] else 0
 
-        # -------- FEATURE VECTOR --------
+# also runs when the view raised, so no trace outlives its request
+@app.teardown_request
+def end_request_trace(exception):
 
-        features = [[
-            review_length,
-            word_count,
-            sentiment,
-            rating,
-            user_review_count,
-            daily_review_count,
-            duplicate_flag,
-            generic_flag
-        ]]
+    token = g.pop("trace_token", None)
 
-        # -------- ML PREDICTION --------
+    if token is not None:
+        metrics.end_trace(token)
 
-        prob_fake = model.predict_proba(features)[0][1]
+# =========================================================
+# PRODUCT ANALYSIS CACHE
+# =========================================================
 
-        suspicious = prob_fake >= THRESHOLD
+PRODUCT_CACHE_SIZE = 256
+PRODUCT_CACHE_TTL = 60  # seconds
 
-        # -------- REASONS --------
+product_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
 
-        reasons = []
 
-        if duplicate_flag:
-            reasons.append("Duplicate review text")
+def invalidate_product(product_id):
 
-        if generic_flag:
-            reasons.append("Generic review")
+    product_cache.invalidate(product_id)
 
-        if user_review_count <= 1:
-            reasons.append("Low reviewer activity")
 
-        analyzed.append({
-            "rating": rating,
-            "text": text,
-            "created_at": created_at,
-            "suspicious": suspicious,
-            "reasons": ", ".join(reasons) if reasons else "Predicted by ML model"
-        })
+# =========================================================
+# CATEGORY RELEVANCE CHECK (rules in relevance_rules.json)
+# =========================================================
 
-    cur.close()
+relevance_rules = RelevanceRules()
 
-    return analyzed
+# drains scoring_jobs queued by bulk ingestion when no worker.py runs
+background_scorer = BackgroundScorer(models, relevance_rules)
 
 
 # =========================================================
@@ -167,7 +143,7 @@ def login():
         email = request.form["email"]
         password = request.form["password"]
 
-        cur = mysql.connection.cursor()
+        cur = db_cursor()
 
         cur.execute("SELECT id,password_hash FROM users WHERE email=%s",(email,))
         user = cur.fetchone()
@@ -190,7 +166,7 @@ def register():
 
     if request.method == "POST":
 
-        cur = mysql.connection.cursor()
+        cur = db_cursor()
 
         cur.execute("""
             INSERT INTO users (email,password_hash,created_at)
@@ -206,37 +182,176 @@ def register():
 
 
 # =========================================================
-# HOME
+# HOME (catalog pages, see catalog.py)
+#   /home?category=Electronics&sort=filtered&after=<cursor>
+# the rendered first page of every category/sort is cached for a
+# few seconds: the landing page is a dictionary lookup under load,
+# and ratings are at most HOME_CACHE_TTL behind the aggregates
 # =========================================================
 
+HOME_CACHE_SIZE = 128
+HOME_CACHE_TTL = 5  # seconds
+
+home_cache = TTLCache(maxsize=HOME_CACHE_SIZE, ttl=HOME_CACHE_TTL)
+
+
 @app.route("/home")
 def home():
 
     if "user_id" not in session:
         return redirect("/")
 
-    cur = mysql.connection.cursor()
+    category = request.args.get("category") or None
+    sort = request.args.get("sort") or catalog.DEFAULT_SORT
+
+    if sort not in catalog.SORTS:
+        return "Invalid sort", 400
+
+    try:
+        after = catalog.decode_cursor(sort, request.args.get("after"))
+    except ValueError:
+        return "Invalid page", 400
+
+    # the search box echoes q back, so those pages are not shared
+    cacheable = after is None and not request.args.get("q")
+
+    if cacheable:
+
+        page = home_cache.get((category, sort))
+
+        if page is not None:
+            return page
 
-    cur.execute("SELECT id,name,price,raw_rating,image_url FROM products LIMIT 12")
+    cur = db_cursor()
 
-    products = cur.fetchall()
+    # ratings are the aggregate's copies in products, no model work here
+    products, next_cursor = catalog.fetch_catalog_page(cur, category, sort, after)
+
+    categories = home_cache.get("categories")
+
+    if categories is None:
+        categories = catalog.fetch_categories(cur)
+        home_cache.set("categories", categories)
 
     cur.close()
 
-    return render_template("home.html",products=products)
+    page = render_template(
+        "home.html",
+        products=products,
+        categories=categories,
+        category=category,
+        sort=sort,
+        next_cursor=next_cursor
+    )
+
+    if cacheable:
+        home_cache.set((category, sort), page)
+
+    return page
 
 
 # =========================================================
 # PRODUCT PAGE
+# reviews are listed a page at a time (scoring.fetch_review_page).
+# Only the requested page is scored on demand; the rest of the
+# product goes to the scoring queue, and the integrity panel reads
+# the product_integrity aggregate instead of the reviews.
 # =========================================================
 
+# ?before=<cursor> from a previous page; ValueError if malformed
+def page_cursor():
+
+    before = request.args.get("before")
+
+    return decode_cursor(before) if before else None
+
+
+# returns (reviews, next_cursor, integrity, complete); complete is
+# False while some review of the product still waits for a score
+def load_review_page(cur, product_id, category, before, limit):
+
+    # watcher thread for promotions, once per process
+    models.start()
+
+    # read once: everything scored below is stamped with this model
+    model_version = models.version
+
+    version = score_version(model_version, relevance_rules)
+
+    with metrics.span("review_page"):
+        reviews, next_cursor = fetch_review_page(cur, product_id, version, before, limit)
+
+    unscored = any(r["suspicious"] is None for r in reviews)
+
+    if unscored and SCORING_MODE == "inline":
+
+        with metrics.span("scoring_inputs"):
+            activity, duplicates = fetch_scoring_inputs(cur, reviews)
+
+        with metrics.span("model_load"):
+            bundle = models.get(model_version)
+
+        # relevance, sentiment, features, inference (scoring.py)
+        with metrics.span("scoring"):
+            scored = score_unscored(
+                reviews, category, activity, duplicates,
+                bundle["model"], bundle["threshold"], relevance_rules
+            )
+
+        with metrics.span("record_scores"):
+            record_scores(cur, product_id, scored, version)
+            mysql.connection.commit()
+
+        apply_scores(reviews, scored)
+
+    with metrics.span("integrity"):
+        integrity = fetch_product_integrity(cur, product_id)
+
+    page_scored = all(r["suspicious"] is not None for r in reviews)
+
+    # the panel (and a cached page) is only final once the aggregate
+    # counts every review of the product with this version: after a
+    # promotion the first pages scored replace it with counts for just
+    # those reviews, and the rest is scored in the background. A
+    # product without reviews has no aggregate and needs none.
+    covered = integrity["review_count"] == 0 or (
+        integrity["model_version"] == version
+        and integrity["total"] == integrity["review_count"]
+    )
+
+    complete = page_scored and covered
+
+    if not complete:
+
+        jobs.enqueue(cur, product_id, jobs.RESCORE_PRODUCT)
+        mysql.connection.commit()
+
+        if SCORING_MODE == "inline":
+            background_scorer.wake()
+
+    return reviews, next_cursor, integrity, complete
+
+
 @app.route("/product/<int:product_id>")
 def product_detail(product_id):
 
     if "user_id" not in session:
         return redirect("/")
 
-    cur = mysql.connection.cursor()
+    try:
+        before = page_cursor()
+    except ValueError:
+        return "Invalid page", 400
+
+    # only the first page is cached
+    if before is None:
+
+        cached = product_cache.get(product_id)
+
+        if cached is not None:
+            return render_product(product_id, *cached)
+
+    cur = db_cursor()
 
     cur.execute("""
         SELECT name,category,description,price,raw_rating,image_url
@@ -249,75 +364,224 @@ def product_detail(product_id):
         cur.close()
         return "Product not found",404
 
-    product_category = product[1]
+    reviews, next_cursor, integrity, complete = load_review_page(
+        cur, product_id, product[1], before, REVIEW_PAGE_SIZE
+    )
 
-    cur.execute("""
-        SELECT user_id,rating,review_text,created_at
-        FROM reviews
-        WHERE product_id=%s
-        ORDER BY created_at DESC
-    """,(product_id,))
+    cur.close()
+
+    # pages still waiting for the scoring queue are not cached
+    if before is None and complete:
+        product_cache.set(product_id, (product, reviews, next_cursor, integrity))
+
+    return render_product(product_id, product, reviews, next_cursor, integrity)
+
+
+def render_product(product_id, product, reviews, next_cursor, integrity):
+
+    with metrics.span("render"):
+        return render_template(
+            "product.html",
+            product_id=product_id,
+            product=product,
+            reviews=reviews,
+            next_cursor=next_cursor,
+            raw_rating=integrity["raw_rating"],
+            filtered_rating=integrity["filtered_rating"],
+            integrity=integrity
+        )
+
+
+# further pages for the "Older reviews" button:
+#   GET /product/<id>/reviews?before=<cursor>&limit=20
+@app.route("/product/<int:product_id>/reviews")
+def product_reviews(product_id):
 
-    raw_reviews = cur.fetchall()
+    if "user_id" not in session:
+        return jsonify({"error": "login required"}), 401
+
+    try:
+        before = page_cursor()
+        limit = int(request.args.get("limit", REVIEW_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "invalid before or limit"}), 400
+
+    limit = max(1, min(limit, MAX_REVIEW_PAGE_SIZE))
+
+    cur = db_cursor()
+
+    cur.execute("SELECT category FROM products WHERE id=%s", (product_id,))
+    product = cur.fetchone()
+
+    if not product:
+        cur.close()
+        return jsonify({"error": "product not found"}), 404
+
+    reviews, next_cursor, _, _ = load_review_page(cur, product_id, product[0], before, limit)
 
     cur.close()
 
-    relevant_reviews = []
-    final_reviews = []
+    return jsonify({
+        "reviews": [
+            {
+                "id": r["id"],
+                "rating": r["rating"],
+                "text": r["text"],
+                "created_at": r["created_at"].isoformat(),
+                "suspicious": r["suspicious"],
+                "reasons": r["reasons"]
+            }
+            for r in reviews
+        ],
+        "next": next_cursor
+    })
+
+
+# =========================================================
+# BULK INGESTION (see ingest.py)
+#   curl -X POST --data-binary @reviews.jsonl \
+#        -H "Authorization: Bearer $INGEST_TOKEN" /reviews/bulk
+# =========================================================
+
+# unset: only logged-in sessions may ingest or read /stats/*
+INGEST_TOKEN = os.environ.get("INGEST_TOKEN")
+
 
-    for r in raw_reviews:
+# a logged-in session or the ingest token as a bearer token
+def authorized():
 
-        review = {
-            "user_id": r[0],
-            "rating": r[1],
-            "text": r[2],
-            "created_at": r[3]
-        }
+    token_ok = INGEST_TOKEN and request.headers.get("Authorization") == f"Bearer {INGEST_TOKEN}"
 
-        if not is_review_relevant(r[2],product_category):
+    return bool(token_ok) or "user_id" in session
 
-            final_reviews.append({
-                "rating": r[1],
-                "text": r[2],
-                "created_at": r[3],
-                "suspicious": True,
-                "reasons": "Irrelevant to product specifications"
-            })
 
-        else:
+@app.route("/reviews/bulk", methods=["POST"])
+def bulk_ingest():
 
-            relevant_reviews.append(review)
+    if not authorized():
+        return jsonify({"error": "login or ingest token required"}), 401
 
-    analyzed = analyze_reviews(relevant_reviews)
+    data = request.get_data(as_text=True)
 
-    final_reviews.extend(analyzed)
+    if data.count("\n") >= ingest.MAX_LINES:
+        return jsonify({"error": f"at most {ingest.MAX_LINES} lines per batch"}), 413
 
-    total = len(final_reviews)
+    reviews, errors = ingest.parse_jsonl(data)
 
-    genuine = [r for r in final_reviews if not r["suspicious"]]
+    cur = db_cursor()
 
-    raw_rating = round(sum(r["rating"] for r in final_reviews)/total,2) if total else 0
+    try:
+        accepted = ingest.ingest(cur, reviews, errors)
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+
+    products = sorted({r["product_id"] for r in accepted})
+
+    for product_id in products:
+        invalidate_product(product_id)
+
+    # scoring happens after the response
+    if accepted and SCORING_MODE == "inline":
+        background_scorer.wake()
+
+    status = 202 if accepted else 400
+
+    return jsonify({
+        "accepted": len(accepted),
+        "rejected": errors,
+        "queued_products": products
+    }), status
+
+
+# =========================================================
+# MONITORING
+# /stats/* need a session or the ingest token (authorized())
+# =========================================================
+
+@app.route("/stats/cache")
+def cache_stats():
+
+    if not authorized():
+        return jsonify({"error": "login or ingest token required"}), 401
+
+    return jsonify({"product": product_cache.stats(), "home": home_cache.stats()})
+
+
+@app.route("/stats/db")
+def db_stats():
 
-    filtered_rating = None
+    if not authorized():
+        return jsonify({"error": "login or ingest token required"}), 401
 
-    if len(genuine) > 0:
-        filtered_rating = round(sum(r["rating"] for r in genuine)/len(genuine),2)
+    return jsonify(database.get_pool().stats())
 
-    integrity = {
-        "total": total,
-        "genuine": len(genuine),
-        "suspicious": total-len(genuine)
-    }
 
-    return render_template(
-        "product.html",
-        product=product,
-        reviews=final_reviews,
-        raw_rating=raw_rating,
-        filtered_rating=filtered_rating,
-        integrity=integrity
+# Prometheus scrape target: the hot-path metrics plus the pool and
+# cache numbers of /stats/db and /stats/cache; scrape with the ingest
+# token (authorization: credentials in the scrape config)
+@app.route("/metrics")
+def prometheus_metrics():
+
+    if not authorized():
+        return jsonify({"error": "login or ingest token required"}), 401
+
+    pool = database.get_pool().stats()
+    caches = {"product": product_cache.stats(), "home": home_cache.stats()}
+
+    lines = metrics.render()
+
+    lines += metrics.sample_lines(
+        "trueinsight_db_pool_connections", "gauge", "Pooled database connections by state",
+        [({"state": state}, pool[state]) for state in ("open", "active", "idle")]
     )
 
+    for name, key, help in [
+        ("checkouts", "checkouts", "Connections checked out of the pool"),
+        ("waits", "waits", "Checkouts that had to wait for a free connection"),
+        ("wait_seconds", "wait_time", "Time spent waiting for a free connection"),
+        ("timeouts", "timeouts", "Checkouts that gave up waiting"),
+        ("connects", "connects", "Connections opened")
+    ]:
+        lines += metrics.sample_lines(
+            f"trueinsight_db_pool_{name}_total", "counter", help, [({}, pool[key])]
+        )
+
+    for name, key, kind, help in [
+        ("cache_entries", "size", "gauge", "Entries in the page caches"),
+        ("cache_hits_total", "hits", "counter", "Page cache hits"),
+        ("cache_misses_total", "misses", "counter", "Page cache misses")
+    ]:
+        lines += metrics.sample_lines(
+            f"trueinsight_{name}", kind, help,
+            [({"cache": cache}, stats[key]) for cache, stats in caches.items()]
+        )
+
+    return "\n".join(lines) + "\n", 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
+@app.route("/stats/model")
+def model_stats():
+
+    if not authorized():
+        return jsonify({"error": "login or ingest token required"}), 401
+
+    models.start()
+
+    version = models.version
+
+    # the metadata file only: loading the bundle here would undo the
+    # lazy load, and in worker mode the app never scores at all
+    try:
+        metadata = models.metadata(version)
+    except (OSError, ValueError):
+        metadata = {}
+
+    return jsonify({"version": version, "metadata": metadata})
+
 
 # =========================================================
 # LOGOUT
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import ingest
+
+# =========================================================
+# INGESTION THROUGHPUT (reviews / second)
+# runs ingest.py's code path on generated reviews, one transaction
+# per review (what submitting reviews one by one costs) against
+# one transaction per JSONL batch:
+#
+#   python benchmark_ingest.py                         SQLite stand-in
+#   python benchmark_ingest.py --mysql --db scratch    a MySQL database with
+#                                                      the migrations applied
+#
+# the SQLite stand-in is a temporary file database with the tables
+# ingest.py writes; the few MySQL-only statements are rewritten for it
+# below. Never point --mysql at a database you care about: it inserts
+# the generated reviews into existing products.
+# =========================================================
+
+BATCH_SIZES = [100, 1000, 5000]
+
+SINGLE_ROWS = 2000       # one-by-one inserts are slow; fewer of them
+
+SQLITE_SCHEMA = """
+CREATE TABLE products (id INTEGER PRIMARY KEY, review_count INT NOT NULL DEFAULT 0);
+CREATE TABLE reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INT NOT NULL, user_id INT NOT NULL, rating INT NOT NULL,
+    review_text TEXT NOT NULL, created_at TEXT NOT NULL
+);
+CREATE TABLE user_activity (user_id INT PRIMARY KEY, review_count INT NOT NULL DEFAULT 0);
+CREATE TABLE user_daily_activity (
+    user_id INT NOT NULL, day TEXT NOT NULL, review_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+CREATE TABLE scoring_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INT NOT NULL, kind TEXT NOT NULL, status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX idx_scoring_jobs_product ON scoring_jobs (product_id, status);
+"""
+
+_UPSERT = re.compile(
+    r"INSERT INTO (user_activity|user_daily_activity)(.*?)ON DUPLICATE KEY UPDATE "
+    r"review_count = review_count \+ VALUES\(review_count\)",
+    re.S
+)
+
+_CONFLICT_KEYS = {"user_activity": "user_id", "user_daily_activity": "user_id, day"}
+
+
+def _sqlite_sql(query):
+
+    query = _UPSERT.sub(
+        lambda m: (
+            f"INSERT INTO {m.group(1)}{m.group(2)}ON CONFLICT ({_CONFLICT_KEYS[m.group(1)]}) "
+            f"DO UPDATE SET review_count = review_count + excluded.review_count"
+        ),
+        query
+    )
+
+    return query.replace("FROM DUAL", "").replace("%s", "?")
+
+
+class _SQLiteCursor:
+
+    def __init__(self, conn):
+
+        self.cur = conn.cursor()
+
+    def execute(self, query, params=()):
+
+        self.cur.execute(_sqlite_sql(query), params)
+
+    def executemany(self, query, rows):
+
+        self.cur.executemany(_sqlite_sql(query), rows)
+
+    def fetchall(self):
+
+        return self.cur.fetchall()
+
+    def close(self):
+
+        self.cur.close()
+
+
+class SQLiteStandIn:
+
+    def __init__(self, path, products):
+
+        sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+        sqlite3.register_adapter(date, lambda d: d.isoformat())
+
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.conn.executemany("INSERT INTO products (id) VALUES (?)", [(p,) for p in products])
+        self.conn.commit()
+
+    def cursor(self):
+
+        return _SQLiteCursor(self.conn)
+
+    def commit(self):
+
+        self.conn.commit()
+
+    def rollback(self):
+
+        self.conn.rollback()
+
+
+def generate(n, products, users, days, seed):
+
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=days)
+
+    words = "great good bad phone battery screen works fast slow love broke again price".split()
+
+    for _ in range(n):
+        yield json.dumps({
+            "product_id": rng.choice(products),
+            "user_id": rng.randint(1, users),
+            "rating": rng.randint(1, 5),
+            "review_text": " ".join(rng.choices(words, k=rng.randint(3, 40))),
+            "created_at": (start + timedelta(seconds=rng.randint(0, days * 86400))).isoformat()
+        })
+
+
+def run(conn, lines, batch_size):
+
+    cur = conn.cursor()
+
+    inserted = 0
+
+    start = time.perf_counter()
+
+    for i in range(0, len(lines), batch_size):
+
+        reviews, errors = ingest.parse_jsonl("\n".join(lines[i:i + batch_size]))
+
+        inserted += len(ingest.ingest(cur, reviews, errors))
+        conn.commit()
+
+    elapsed = time.perf_counter() - start
+
+    cur.close()
+
+    return inserted, elapsed
+
+
+# the maintained counters must equal a COUNT(*) over the rows
+def check_counters(conn):
+
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT r.user_id, COUNT(*) AS n
+            FROM reviews r
+            GROUP BY r.user_id
+        ) c
+        LEFT JOIN user_activity a ON a.user_id = c.user_id
+        WHERE a.review_count IS NULL OR a.review_count <> c.n
+    """)
+
+    mismatched = cur.fetchall()[0][0]
+
+    cur.close()
+
+    return mismatched
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark bulk review ingestion")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--mysql", action="store_true", help="use MySQL instead of SQLite")
+    parser.add_argument("--db", help="scratch MySQL database (required with --mysql)")
+    args = parser.parse_args()
+
+    if args.mysql:
+
+        import database
+
+        if not args.db:
+            parser.error("--mysql needs --db <scratch database>")
+
+        conn = database.connect(db=args.db)
+
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM products ORDER BY id LIMIT %s", (args.products,))
+        products = [row[0] for row in cur.fetchall()]
+        cur.close()
+
+        if not products:
+            parser.error(f"{args.db} has no products")
+
+        backend = f"MySQL ({args.db})"
+
+    else:
+
+        tmp = tempfile.mkdtemp(prefix="ingest-bench-")
+
+        products = list(range(1, args.products + 1))
+        conn = SQLiteStandIn(os.path.join(tmp, "bench.db"), products)
+
+        backend = f"SQLite stand-in ({tmp})"
+
+    print(f"{backend}: {args.products} products, {args.users} users, {args.days} days\n")
+    print(f"{'batch size':>10} {'reviews':>8} {'seconds':>8} {'reviews/s':>10}")
+
+    lines = list(generate(max(args.rows, SINGLE_ROWS), products, args.users, args.days, seed=0))
+
+    baseline = None
+
+    for batch_size in [1] + BATCH_SIZES:
+
+        rows = lines[:SINGLE_ROWS] if batch_size == 1 else lines[:args.rows]
+
+        inserted, elapsed = run(conn, rows, batch_size)
+
+        rate = inserted / elapsed
+        baseline = baseline or rate
+
+        print(f"{batch_size:>10} {inserted:>8} {elapsed:>8.2f} {rate:>10.0f}  ({rate / baseline:.1f}x)")
+
+    mismatched = check_counters(conn)
+
+    print(f"\nuser_activity {'matches' if not mismatched else f'DIFFERS for {mismatched} users from'} COUNT(*) over reviews")
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+# =========================================================
+# BOUNDED LRU + TTL CACHE
+# thread-safe (flask serves requests from several threads);
+# entries expire after ttl seconds and the least recently used
+# entry is evicted once maxsize is reached
+# =========================================================
+
+class TTLCache:
+
+    def __init__(self, maxsize=256, ttl=60, clock=time.monotonic):
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+
+        with self._lock:
+
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key, value):
+
+        with self._lock:
+
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+
+        with self._lock:
+
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+
+        with self._lock:
+
+            lookups = self.hits + self.misses
+
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,124 @@
+from decimal import Decimal, InvalidOperation
+
+# =========================================================
+# CATALOG PAGES (/home)
+# products filtered by category and sorted by id, review rating or
+# filtered rating, a page at a time. The ratings are copies of the
+# product_integrity aggregate kept in products
+# (scoring.sync_product_ratings), so every filter + sort is one
+# range on a composite index (migration 007) and a page continues
+# after the previous page's last (sort value, id) instead of using
+# OFFSET.
+# =========================================================
+
+PAGE_SIZE = 12
+
+# sort name -> products column, or None for catalog (id) order
+SORTS = {
+    "default": None,
+    "rating": "review_rating",
+    "filtered": "filtered_rating"
+}
+
+DEFAULT_SORT = "default"
+
+
+def encode_cursor(sort, product):
+
+    if SORTS[sort] is None:
+        return str(product["id"])
+
+    return f"{product['sort_value']}_{product['id']}"
+
+
+# ValueError for anything that is not a cursor of this sort
+def decode_cursor(sort, value):
+
+    if value is None:
+        return None
+
+    if SORTS[sort] is None:
+        return (int(value),)
+
+    sort_value, _, product_id = value.rpartition("_")
+
+    try:
+        rating = Decimal(sort_value)
+    except InvalidOperation:
+        raise ValueError(f"invalid cursor {value!r}")
+
+    # Decimal also parses NaN / Infinity, which MySQLdb would inline
+    # unquoted into the query
+    if not rating.is_finite():
+        raise ValueError(f"invalid cursor {value!r}")
+
+    return rating, int(product_id)
+
+
+# returns (products, next_cursor); products are tuples
+# (id, name, price, rating, image_url, filtered_rating or None)
+
+def fetch_catalog_page(cur, category, sort, after=None, limit=PAGE_SIZE):
+
+    column = SORTS[sort]
+
+    where = []
+    params = []
+
+    if category:
+        where.append("category = %s")
+        params.append(category)
+
+    if column is None:
+
+        order = "id"
+
+        if after:
+            where.append("id > %s")
+            params.append(after[0])
+
+    else:
+
+        # best first; ties broken by id so the order is total
+        order = f"{column} DESC, id DESC"
+
+        if after:
+            where.append(f"({column} < %s OR ({column} = %s AND id < %s))")
+            params += [after[0], after[0], after[1]]
+
+    # one extra row tells whether there is a next page; a product with
+    # no stored rating yet shows its listed raw_rating (migration 009
+    # seeds new rows, this covers any written around it)
+    cur.execute(f"""
+        SELECT id, name, price,
+               IF(review_rating = 0, COALESCE(raw_rating, 0), review_rating),
+               image_url, filtered_rating,
+               {column or 'id'}
+        FROM products
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY {order}
+        LIMIT %s
+    """, (*params, limit + 1))
+
+    rows = cur.fetchall()
+
+    products = [
+        # filtered_rating 0 = no genuine reviews yet
+        (row[0], row[1], row[2], row[3], row[4], row[5] or None)
+        for row in rows[:limit]
+    ]
+
+    next_cursor = None
+
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(sort, {"id": last[0], "sort_value": last[6]})
+
+    return products, next_cursor
+
+
+def fetch_categories(cur):
+
+    cur.execute("SELECT DISTINCT category FROM products WHERE category IS NOT NULL ORDER BY category")
+
+    return [row[0] for row in cur.fetchall()]
@@ -0,0 +1,169 @@
+import sys
+
+import catalog
+from features import fetch_user_activity
+from scoring import (
+    fetch_review_page,
+    fetch_product_reviews,
+    fetch_product_integrity,
+    decode_cursor
+)
+
+# =========================================================
+# HOT QUERY INDEX CHECK
+# runs the app's hot read paths against the database through a
+# cursor that EXPLAINs every SELECT before executing it, and fails
+# when a plan scans a whole table or sorts in a filesort:
+#
+#   python check_indexes.py
+#
+# the plans come from the real functions (not copies of their SQL),
+# so a query edited later is checked as it is. Run it on a database
+# with production-like data: on a nearly empty table the optimizer
+# may rightly prefer a scan.
+# =========================================================
+
+class ExplainCursor:
+
+    def __init__(self, cur):
+
+        self.cur = cur
+        self.plans = []
+
+    def execute(self, query, params=()):
+
+        if query.lstrip().upper().startswith("SELECT"):
+
+            self.cur.execute("EXPLAIN " + query, params)
+
+            names = [d[0].lower() for d in self.cur.description]
+            self.plans.append((query, [dict(zip(names, row)) for row in self.cur.fetchall()]))
+
+        self.cur.execute(query, params)
+
+    def fetchall(self):
+
+        return self.cur.fetchall()
+
+    def fetchone(self):
+
+        return self.cur.fetchone()
+
+    def close(self):
+
+        self.cur.close()
+
+
+def problems(plan):
+
+    found = []
+
+    for row in plan:
+
+        extra = row.get("extra") or ""
+
+        if row.get("type") == "ALL":
+            found.append(f"full scan of {row['table']}")
+
+        if "Using filesort" in extra:
+            found.append(f"filesort on {row['table']}")
+
+    return found
+
+
+# (label, callable taking a cursor); sample ids are read from the data
+def hot_paths(cur):
+
+    cur.execute("""
+        SELECT product_id FROM reviews
+        GROUP BY product_id
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+    """)
+    row = cur.fetchone()
+
+    if not row:
+        sys.exit("reviews is empty: load representative data first")
+
+    product_id = row[0]
+
+    cur.execute("SELECT category FROM products WHERE id = %s", (product_id,))
+    category = cur.fetchone()[0]
+
+    cur.execute("""
+        SELECT id, user_id, created_at FROM reviews
+        WHERE product_id = %s
+        ORDER BY created_at DESC, id DESC
+        LIMIT 50
+    """, (product_id,))
+    sample = [{"id": r[0], "user_id": r[1], "created_at": r[2]} for r in cur.fetchall()]
+
+    middle = sample[len(sample) // 2]
+    before = decode_cursor(f"{middle['created_at'].isoformat()}_{middle['id']}")
+
+    version = "check"
+
+    return [
+        ("product page, first page", lambda c: fetch_review_page(c, product_id, version)),
+        ("product page, later page", lambda c: fetch_review_page(c, product_id, version, before)),
+        ("all reviews of a product (worker)", lambda c: fetch_product_reviews(c, product_id, version)),
+        ("integrity aggregate", lambda c: fetch_product_integrity(c, product_id)),
+        ("reviewer activity counters", lambda c: fetch_user_activity(c, sample)),
+        ("catalog, default order", lambda c: catalog.fetch_catalog_page(c, None, "default")),
+        ("catalog, category + filtered rating",
+         lambda c: catalog.fetch_catalog_page(c, category, "filtered")),
+        ("catalog, rating, later page",
+         lambda c: catalog.fetch_catalog_page(c, None, "rating", catalog.decode_cursor("rating", "5.00_1"))),
+        ("catalog categories", catalog.fetch_categories)
+    ]
+
+
+def check(conn):
+
+    cur = conn.cursor()
+
+    failures = 0
+
+    for label, run in hot_paths(cur):
+
+        explain = ExplainCursor(conn.cursor())
+
+        run(explain)
+
+        explain.close()
+
+        for query, plan in explain.plans:
+
+            found = problems(plan)
+            failures += bool(found)
+
+            print(f"{'❌' if found else '✅'} {label}")
+
+            for row in plan:
+                print(
+                    f"     {row['table']:<20} type={row.get('type')!s:<7} "
+                    f"key={row.get('key')!s:<40} rows={row.get('rows')!s:<8} {row.get('extra') or ''}"
+                )
+
+            for problem in found:
+                print(f"     → {problem}")
+
+    cur.close()
+
+    return failures
+
+
+if __name__ == "__main__":
+
+    import database
+
+    conn = database.connect()
+
+    failures = check(conn)
+
+    conn.close()
+
+    if failures:
+        sys.exit(f"\n{failures} hot quer{'y' if failures == 1 else 'ies'} without a usable index")
+
+    print("\nall hot queries use an index")
@@ -1,5 +1,20 @@
+# defaults; every value can be overridden by an environment
+# variable of the same name (database.py, app.py)
+
 MYSQL_HOST = 'localhost'
+MYSQL_PORT = 3306
 MYSQL_USER = 'root'
 MYSQL_PASSWORD = 'password'
-MYSQL_DB = 'reviewlens'
+MYSQL_DB = 'trueinsight'
+
+# connection pool (per process)
+DB_POOL_SIZE = 10          # connections; keep >= the app's request threads
+DB_POOL_TIMEOUT = 10       # seconds a request waits for a free connection
+DB_POOL_RECYCLE = 3600     # seconds; below the server's wait_timeout
+
+# seconds; 0 = no limit
+DB_CONNECT_TIMEOUT = 5
+DB_READ_TIMEOUT = 0
+DB_WRITE_TIMEOUT = 0
+
 SECRET_KEY = 'dev-secret'
@@ -0,0 +1,337 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+# =========================================================
+# DATABASE ACCESS
+# connection settings in one place (config.py, each value
+# overridable by an environment variable of the same name) and a
+# bounded pool of MySQLdb connections shared by the web app, the
+# background scorer and the ml scripts:
+#
+#   with database.connection() as conn:    check out, give back
+#       cur = conn.cursor()
+#
+#   conn = database.connect()              plain connection for
+#                                          one-shot scripts
+#
+# the driver is imported on first connect, so modules that only
+# need the settings (or run on the SQLite stand-ins) import this
+# file without MySQLdb installed.
+# =========================================================
+
+def _setting(name, cast=str):
+
+    value = os.environ.get(name)
+
+    return getattr(config, name) if value is None else cast(value)
+
+
+PARAMS = dict(
+    host=_setting("MYSQL_HOST"),
+    port=_setting("MYSQL_PORT", int),
+    user=_setting("MYSQL_USER"),
+    passwd=_setting("MYSQL_PASSWORD"),
+    db=_setting("MYSQL_DB"),
+    charset="utf8mb4"
+)
+
+# seconds; 0 = no limit (the driver default)
+TIMEOUTS = dict(
+    connect_timeout=_setting("DB_CONNECT_TIMEOUT", int),
+    read_timeout=_setting("DB_READ_TIMEOUT", int),
+    write_timeout=_setting("DB_WRITE_TIMEOUT", int)
+)
+
+PARAMS.update({key: value for key, value in TIMEOUTS.items() if value})
+
+POOL_SIZE = _setting("DB_POOL_SIZE", int)          # connections per process
+POOL_TIMEOUT = _setting("DB_POOL_TIMEOUT", float)  # seconds to wait for a free one
+POOL_RECYCLE = _setting("DB_POOL_RECYCLE", int)    # seconds before a connection is replaced
+
+# a connection idle for longer is pinged before it is handed out,
+# so one the server closed (wait_timeout) is replaced, not returned
+PING_AFTER = 30
+
+
+def connect(**overrides):
+
+    import MySQLdb
+
+    return MySQLdb.connect(**dict(PARAMS, **overrides))
+
+
+# rows as dicts keyed by column name
+def dict_cursor(conn):
+
+    import MySQLdb.cursors
+
+    return conn.cursor(MySQLdb.cursors.DictCursor)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# =========================================================
+# CONNECTION POOL
+# at most `size` connections are open; checkout takes the most
+# recently returned idle one (LIFO keeps the rest idle long enough
+# to be recycled), opens a new one while below size, or waits up to
+# `timeout` seconds for one to come back. Connecting and pinging
+# happen outside the lock. Checkin rolls back whatever the user left
+# uncommitted; a connection that fails that is closed instead of
+# being reused.
+# =========================================================
+
+class ConnectionPool:
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE,
+                 connect=connect, clock=time.monotonic):
+
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.connect = connect
+        self.clock = clock
+
+        self.pid = os.getpid()
+
+        self._idle = []        # (conn, opened_at, returned_at)
+        self._opened = {}      # id(conn) -> opened_at, checked-out connections
+        self._open = 0         # idle + checked out + being connected
+        self._cond = threading.Condition()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def checkout(self):
+
+        start = self.clock()
+        waited = False
+
+        with self._cond:
+
+            while not self._idle and self._open >= self.size:
+
+                remaining = start + self.timeout - self.clock()
+
+                if remaining <= 0:
+                    self._waited(start)
+                    self.timeouts += 1
+                    raise PoolTimeout(f"no database connection free after {self.timeout}s")
+
+                waited = True
+                self._cond.wait(remaining)
+
+            if waited:
+                self._waited(start)
+
+            self.checkouts += 1
+
+            if self._idle:
+                conn, opened_at, returned_at = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+
+        # replaced: "recycled" (too old) or "discarded" (failed the ping)
+        replaced = None
+
+        try:
+            now = self.clock()
+
+            if conn is not None and now - opened_at >= self.recycle:
+                replaced = "recycled"
+
+            elif conn is not None and now - returned_at >= PING_AFTER:
+                try:
+                    conn.ping()
+                except Exception:
+                    replaced = "discarded"
+
+            if replaced:
+                self._close(conn)
+                conn = None
+
+            connected = conn is None
+
+            if connected:
+                conn = self.connect()
+                opened_at = self.clock()
+
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+
+            self._opened[id(conn)] = opened_at
+
+            self.recycled += replaced == "recycled"
+            self.discarded += replaced == "discarded"
+            self.connects += connected
+
+        return conn
+
+    # under the lock; timed-out waits count too
+    def _waited(self, start):
+
+        elapsed = self.clock() - start
+
+        self.waits += 1
+        self.wait_time += elapsed
+        self.max_wait = max(self.max_wait, elapsed)
+
+    def checkin(self, conn):
+
+        try:
+            conn.rollback()
+            broken = False
+        except Exception:
+            broken = True
+
+        with self._cond:
+
+            opened_at = self._opened.pop(id(conn))
+
+            if broken:
+                self._open -= 1
+                self.discarded += 1
+            else:
+                self._idle.append((conn, opened_at, self.clock()))
+
+            self._cond.notify()
+
+        if broken:
+            self._close(conn)
+
+    @contextmanager
+    def connection(self):
+
+        conn = self.checkout()
+
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def _close(self, conn):
+
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self):
+
+        with self._cond:
+
+            return {
+                "size": self.size,
+                "open": self._open,
+                "active": len(self._opened),
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time": round(self.wait_time, 4),
+                "avg_wait": round(self.wait_time / self.checkouts, 6) if self.checkouts else 0.0,
+                "max_wait": round(self.max_wait, 4),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "recycled": self.recycled,
+                "discarded": self.discarded
+            }
+
+
+# =========================================================
+# PROCESS-WIDE POOL
+# created on first use. A forked child (worker.py's process pool)
+# gets a pool of its own: the parent's sockets are left alone,
+# closing them from the child would end the parent's sessions.
+# =========================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+
+    global _pool
+
+    with _pool_lock:
+
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool()
+
+        return _pool
+
+
+def connection():
+
+    return get_pool().connection()
+
+
+# =========================================================
+# FLASK
+# drop-in for flask_mysqldb.MySQL: mysql.connection is one pooled
+# connection per request, checked out on first use and returned
+# (uncommitted work rolled back) when the app context ends
+# =========================================================
+
+class FlaskDB:
+
+    def __init__(self, app=None, pool=None):
+
+        self._pool = pool
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def pool(self):
+
+        return self._pool or get_pool()
+
+    @property
+    def connection(self):
+
+        from flask import g
+
+        if "db_connection" not in g:
+            g.db_connection = self.pool.checkout()
+
+        return g.db_connection
+
+    def teardown(self, exception):
+
+        from flask import g
+
+        conn = g.pop("db_connection", None)
+
+        if conn is not None:
+            self.pool.checkin(conn)
@@ -0,0 +1,345 @@
+import argparse
+import hashlib
+import re
+
+import numpy as np
+
+# =========================================================
+# DUPLICATE / NEAR-DUPLICATE INDEX
+# every review gets a fingerprint row (review_fingerprints):
+#   - text_hash: 64-bit hash of the normalized text -> exact
+#     duplicates are one indexed lookup
+#   - signature: MinHash over word 3-grams; its bands are stored in
+#     review_lsh_buckets, so near-duplicate candidates come from a
+#     few indexed bucket lookups instead of a scan of the corpus
+# reviews are indexed incrementally (index_reviews) and the lookup
+# (fetch_duplicate_flags) covers the whole corpus, for serving
+# (scoring.py) and training (ml/dataset_builder.py) alike.
+# =========================================================
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 3              # shorter texts only take part in exact matching
+
+NEAR_DUP_THRESHOLD = 0.8      # estimated Jaccard similarity
+MAX_CANDIDATES = 200          # per review, bounds hot buckets
+
+IN_CHUNK_SIZE = 1000
+
+EXACT = "exact"
+NEAR = "near"
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def _chunks(values, size):
+
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def normalize(text):
+
+    return text.lower().strip()
+
+
+def _hash64(data):
+
+    return int.from_bytes(
+        hashlib.blake2b(data, digest_size=8).digest(), "little", signed=True
+    )
+
+
+def text_hash(text):
+
+    return _hash64(normalize(text).encode("utf-8"))
+
+
+def shingles(text):
+
+    words = _WORD.findall(normalize(text))
+
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+# None when the text is too short for a meaningful signature
+def minhash_signature(text):
+
+    grams = shingles(text)
+
+    if len(grams) < MIN_SHINGLES:
+        return None
+
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little")
+         for g in grams),
+        dtype=np.uint64,
+        count=len(grams)
+    )
+
+    # (a * x + b) mod p per permutation, wrapping in uint64 like datasketch
+    with np.errstate(over="ignore"):
+        phv = ((np.outer(hv, _A) + _B) % _MERSENNE) & _MAX_HASH
+
+    return phv.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature):
+
+    return [
+        _hash64(bytes([band]) + signature[band * ROWS:(band + 1) * ROWS].tobytes())
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+
+    return float(np.mean(sig_a == sig_b))
+
+
+# =========================================================
+# INDEX MAINTENANCE
+# =========================================================
+
+# reviews: dicts with "id" and "text"; already indexed ids are skipped.
+# caller commits.
+
+def index_reviews(cur, reviews):
+
+    if not reviews:
+        return 0
+
+    indexed = set()
+
+    for chunk in _chunks([r["id"] for r in reviews], IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["%s"] * len(chunk))
+
+        cur.execute(
+            f"SELECT review_id FROM review_fingerprints WHERE review_id IN ({placeholders})",
+            tuple(chunk)
+        )
+        indexed.update(row[0] for row in cur.fetchall())
+
+    fingerprints = []
+    buckets = []
+
+    for r in reviews:
+
+        if r["id"] in indexed:
+            continue
+
+        indexed.add(r["id"])
+
+        signature = minhash_signature(r["text"])
+
+        fingerprints.append((
+            r["id"],
+            text_hash(r["text"]),
+            signature.tobytes() if signature is not None else None
+        ))
+
+        if signature is not None:
+            buckets.extend((b, r["id"]) for b in band_buckets(signature))
+
+    if fingerprints:
+        cur.executemany("""
+            INSERT IGNORE INTO review_fingerprints (review_id, text_hash, signature)
+            VALUES (%s, %s, %s)
+        """, fingerprints)
+
+    if buckets:
+        cur.executemany("""
+            INSERT IGNORE INTO review_lsh_buckets (bucket, review_id)
+            VALUES (%s, %s)
+        """, buckets)
+
+    return len(fingerprints)
+
+
+# =========================================================
+# LOOKUP
+# =========================================================
+
+# {review_id: EXACT | NEAR | None} for the given (indexed or not yet
+# indexed) reviews against the whole corpus; a review never matches
+# itself. Indexes missing reviews first, so the caller commits.
+
+def fetch_duplicate_flags(cur, reviews):
+
+    if not reviews:
+        return {}
+
+    index_reviews(cur, reviews)
+
+    hashes = {r["id"]: text_hash(r["text"]) for r in reviews}
+
+    # -------- exact: another review with the same normalized text --------
+
+    hash_counts = {}
+
+    for chunk in _chunks(sorted(set(hashes.values())), IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["%s"] * len(chunk))
+
+        cur.execute(f"""
+            SELECT text_hash, COUNT(*) FROM review_fingerprints
+            WHERE text_hash IN ({placeholders})
+            GROUP BY text_hash
+        """, tuple(chunk))
+        hash_counts.update(cur.fetchall())
+
+    flags = {}
+
+    for r in reviews:
+        # the review's own fingerprint is part of the count
+        flags[r["id"]] = EXACT if hash_counts.get(hashes[r["id"]], 0) > 1 else None
+
+    # -------- near: shared LSH bucket, confirmed on the signatures --------
+
+    signatures = {}
+    review_buckets = {}
+
+    for r in reviews:
+
+        if flags[r["id"]]:
+            continue
+
+        signature = minhash_signature(r["text"])
+
+        if signature is None:
+            continue
+
+        signatures[r["id"]] = signature
+        review_buckets[r["id"]] = band_buckets(signature)
+
+    if not signatures:
+        return flags
+
+    bucket_members = {}
+
+    all_buckets = sorted({b for bs in review_buckets.values() for b in bs})
+
+    for chunk in _chunks(all_buckets, IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["%s"] * len(chunk))
+
+        cur.execute(f"""
+            SELECT bucket, review_id FROM review_lsh_buckets
+            WHERE bucket IN ({placeholders})
+        """, tuple(chunk))
+
+        for bucket, review_id in cur.fetchall():
+            bucket_members.setdefault(bucket, []).append(review_id)
+
+    candidates = {}
+
+    for review_id, bs in review_buckets.items():
+
+        found = set()
+
+        for b in bs:
+            found.update(bucket_members.get(b, ()))
+            if len(found) > MAX_CANDIDATES:
+                break
+
+        found.discard(review_id)
+
+        if found:
+            candidates[review_id] = found
+
+    candidate_signatures = {}
+
+    wanted = sorted({c for found in candidates.values() for c in found})
+
+    for chunk in _chunks(wanted, IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["%s"] * len(chunk))
+
+        cur.execute(f"""
+            SELECT review_id, signature FROM review_fingerprints
+            WHERE review_id IN ({placeholders}) AND signature IS NOT NULL
+        """, tuple(chunk))
+
+        for review_id, blob in cur.fetchall():
+            candidate_signatures[review_id] = np.frombuffer(blob, dtype=np.uint32)
+
+    for review_id, found in candidates.items():
+
+        signature = signatures[review_id]
+
+        for c in found:
+            other = candidate_signatures.get(c)
+            if other is not None and similarity(signature, other) >= NEAR_DUP_THRESHOLD:
+                flags[review_id] = NEAR
+                break
+
+    return flags
+
+
+# =========================================================
+# BACKFILL
+#   python duplicates.py --batch-size 5000
+# =========================================================
+
+def backfill(conn, batch_size):
+
+    cur = conn.cursor()
+
+    last_id = 0
+    total = 0
+
+    while True:
+
+        cur.execute("""
+            SELECT r.id, r.review_text
+            FROM reviews r
+            LEFT JOIN review_fingerprints f ON f.review_id = r.id
+            WHERE r.id > %s AND f.review_id IS NULL
+            ORDER BY r.id
+            LIMIT %s
+        """, (last_id, batch_size))
+
+        rows = cur.fetchall()
+
+        if not rows:
+            break
+
+        last_id = rows[-1][0]
+
+        total += index_reviews(cur, [{"id": i, "text": t} for i, t in rows])
+        conn.commit()
+
+        print(f"indexed {total} reviews")
+
+    cur.close()
+
+    return total
+
+
+if __name__ == "__main__":
+
+    import database
+
+    parser = argparse.ArgumentParser(description="Index existing reviews for duplicate detection")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    conn = database.connect()
+
+    backfill(conn, args.batch_size)
+
+    conn.close()
@@ -0,0 +1,216 @@
+# =========================================================
+# SHARED FEATURE HELPERS
+# used by app.py (serving) and ml/dataset_builder.py (training)
+# so both sides compute reviewer activity the same way
+# =========================================================
+
+from collections import Counter
+
+# MySQL handles long IN lists fine, but keep each query bounded
+IN_CHUNK_SIZE = 1000
+
+# model input, in order: scoring.analyze_reviews builds rows like
+# this and ml/feature_store.py refuses training data without them
+FEATURE_COLUMNS = [
+    "review_length",
+    "word_count",
+    "sentiment",
+    "rating",
+    "user_review_count",
+    "daily_review_count",
+    "duplicate_flag",
+    "generic_flag"
+]
+
+
+def _chunks(values, size):
+
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# =========================================================
+# REVIEWER ACTIVITY (maintained counters, see record_activity)
+# =========================================================
+
+def _day(created_at):
+
+    return created_at.date() if hasattr(created_at, "date") else created_at
+
+
+# returns (user_counts, daily_counts) for the given reviews (dicts
+# with user_id and created_at):
+#   user_counts[user_id]          -> total reviews by user
+#   daily_counts[(user_id, date)] -> reviews by user on that day
+# both are primary-key lookups in user_activity / user_daily_activity.
+# cur must be a plain (tuple) cursor; reviews=None reads every counter
+
+def fetch_user_activity(cur, reviews=None):
+
+    user_counts = {}
+    daily_counts = {}
+
+    if reviews is None:
+
+        cur.execute("SELECT user_id, review_count FROM user_activity")
+        user_counts.update(cur.fetchall())
+
+        cur.execute("SELECT user_id, day, review_count FROM user_daily_activity")
+        for user_id, day, cnt in cur.fetchall():
+            daily_counts[(user_id, day)] = cnt
+
+        return user_counts, daily_counts
+
+    user_ids = sorted({r["user_id"] for r in reviews})
+    days = sorted({(r["user_id"], _day(r["created_at"])) for r in reviews})
+
+    for chunk in _chunks(user_ids, IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["%s"] * len(chunk))
+
+        cur.execute(f"""
+            SELECT user_id, review_count
+            FROM user_activity
+            WHERE user_id IN ({placeholders})
+        """, tuple(chunk))
+        user_counts.update(cur.fetchall())
+
+    for chunk in _chunks(days, IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["(%s, %s)"] * len(chunk))
+
+        cur.execute(f"""
+            SELECT user_id, day, review_count
+            FROM user_daily_activity
+            WHERE (user_id, day) IN ({placeholders})
+        """, tuple(v for key in chunk for v in key))
+        for user_id, day, cnt in cur.fetchall():
+            daily_counts[(user_id, day)] = cnt
+
+    return user_counts, daily_counts
+
+
+def activity_for(user_counts, daily_counts, user_id, created_at):
+
+    return (
+        user_counts.get(user_id, 0),
+        daily_counts.get((user_id, _day(created_at)), 0)
+    )
+
+
+# =========================================================
+# MAINTAINED ACTIVITY COUNTERS (user_activity / user_daily_activity)
+# every code path that inserts reviews calls record_activity in the
+# same transaction; reviews written any other way (manual inserts,
+# imports, deletes) are reconciled by the backfill below.
+# =========================================================
+
+# bump the counters for newly inserted reviews (dicts with user_id and
+# created_at), in the inserting transaction; caller commits. Keys are
+# written in sorted order so concurrent batches lock rows in the same
+# order instead of deadlocking.
+
+def record_activity(cur, reviews):
+
+    if not reviews:
+        return
+
+    per_user = Counter(r["user_id"] for r in reviews)
+
+    per_day = Counter((r["user_id"], _day(r["created_at"])) for r in reviews)
+
+    cur.executemany("""
+        INSERT INTO user_activity (user_id, review_count)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE review_count = review_count + VALUES(review_count)
+    """, sorted(per_user.items()))
+
+    cur.executemany("""
+        INSERT INTO user_daily_activity (user_id, day, review_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE review_count = review_count + VALUES(review_count)
+    """, [(user_id, day, count) for (user_id, day), count in sorted(per_day.items())])
+
+
+# =========================================================
+# BACKFILL / RECONCILE
+#   python features.py --batch-size 5000
+# recounts the counters from reviews one range of user ids at a
+# time; each range is replaced in its own transaction, so it is
+# safe to rerun while reviews are being ingested.
+# =========================================================
+
+def backfill_activity(conn, batch_size):
+
+    cur = conn.cursor()
+
+    cur.execute("SELECT MIN(user_id), MAX(user_id) FROM reviews")
+    low, high = cur.fetchone()
+
+    cur.execute("SELECT MIN(user_id), MAX(user_id) FROM user_activity")
+    counted_low, counted_high = cur.fetchone()
+
+    # counters of users whose reviews are all gone are cleared too
+    bounds = [v for v in (low, high, counted_low, counted_high) if v is not None]
+
+    if not bounds:
+        cur.close()
+        return 0
+
+    users = 0
+
+    for start in range(min(bounds), max(bounds) + 1, batch_size):
+
+        end = start + batch_size
+
+        cur.execute(
+            "DELETE FROM user_activity WHERE user_id >= %s AND user_id < %s",
+            (start, end)
+        )
+        cur.execute(
+            "DELETE FROM user_daily_activity WHERE user_id >= %s AND user_id < %s",
+            (start, end)
+        )
+
+        cur.execute("""
+            INSERT INTO user_activity (user_id, review_count)
+            SELECT user_id, COUNT(*)
+            FROM reviews
+            WHERE user_id >= %s AND user_id < %s
+            GROUP BY user_id
+        """, (start, end))
+
+        users += cur.rowcount
+
+        cur.execute("""
+            INSERT INTO user_daily_activity (user_id, day, review_count)
+            SELECT user_id, DATE(created_at), COUNT(*)
+            FROM reviews
+            WHERE user_id >= %s AND user_id < %s
+            GROUP BY user_id, DATE(created_at)
+        """, (start, end))
+
+        conn.commit()
+
+        print(f"counted users up to {end - 1}: {users} with reviews")
+
+    cur.close()
+
+    return users
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    import database
+
+    parser = argparse.ArgumentParser(description="Rebuild the reviewer activity counters from reviews")
+    parser.add_argument("--batch-size", type=int, default=5000, help="user ids per transaction")
+    args = parser.parse_args()
+
+    conn = database.connect()
+
+    backfill_activity(conn, args.batch_size)
+
+    conn.close()
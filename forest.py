@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import warnings
+
+import joblib
+import numpy as np
+
+# =========================================================
+# COMPACT FOREST ARTIFACT
+# the RandomForest in review_model.pkl flattened into plain node
+# arrays, one .npy file each, next to the pickle:
+#
+#   model/review_model.forest/
+#       meta.json      threshold, features, depth, source pickle version
+#       roots.npy      first node of every tree
+#       feature.npy    split feature per node
+#       threshold.npy  split threshold per node
+#       children.npy   (left, right) child per node (global index)
+#       value.npy      class probabilities per node
+#
+# leaves point back to themselves, so depth steps of the same
+# gather/compare bring every row of every tree to its leaf.
+#
+# the arrays are memory-mapped read-only, so loading is cheap and
+# every web / worker process on a host shares the same pages.
+# predict_proba matches sklearn exactly (same float32 split
+# comparisons, same per-tree accumulation order) and avoids its
+# per-call overhead, which dominates for a few dozen reviews.
+# Past SKLEARN_ROWS sklearn's compiled tree walk is faster (2048
+# rows: 2x, 8192: 3-4x, ml/benchmark_inference.py), so bigger
+# batches (a whole product rescored by the worker after a
+# promotion) go to the pickled model, unpickled on first use.
+# =========================================================
+
+ARRAYS = ["roots", "feature", "threshold", "children", "value"]
+
+META_FILE = "meta.json"
+
+# bumped whenever the array layout changes; older exports are ignored
+FORMAT = 2
+
+BLOCK_ROWS = 4096
+
+# larger batches use the sklearn model, when its pickle is known
+SKLEARN_ROWS = 512
+
+
+def forest_dir(model_path):
+
+    return os.path.splitext(model_path)[0] + ".forest"
+
+
+def export_forest(model, path, threshold, features, version):
+
+    roots = []
+    feature = []
+    split = []
+    children = []
+    value = []
+
+    offset = 0
+    depth = 0
+
+    for estimator in model.estimators_:
+
+        tree = estimator.tree_
+
+        is_leaf = tree.children_left == -1
+
+        # normalized like DecisionTreeClassifier.predict_proba
+        counts = tree.value[:, 0, :]
+        normalizer = counts.sum(axis=1)
+        normalizer[normalizer == 0.0] = 1.0
+
+        own = np.arange(tree.node_count) + offset
+
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        split.append(tree.threshold)
+        children.append(np.column_stack([
+            np.where(is_leaf, own, tree.children_left + offset),
+            np.where(is_leaf, own, tree.children_right + offset)
+        ]))
+        depth = max(depth, tree.max_depth)
+        value.append(counts / normalizer[:, None])
+
+        offset += tree.node_count
+
+    os.makedirs(path, exist_ok=True)
+
+    arrays = {
+        "roots": np.array(roots, dtype=np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(split).astype(np.float64),
+        "children": np.concatenate(children).astype(np.int32),
+        "value": np.concatenate(value).astype(np.float64)
+    }
+
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), array)
+
+    meta = {
+        "format": FORMAT,
+        "version": version,
+        "threshold": float(threshold),
+        "features": list(features),
+        "depth": depth,
+        "n_trees": len(roots),
+        "n_nodes": offset
+    }
+
+    # meta.json last: a half-written export is never picked up
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return meta
+
+
+def read_meta(path):
+
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return meta if meta.get("format") == FORMAT else None
+
+
+class CompactForest:
+
+    # model_path: the pickle the arrays were exported from
+    def __init__(self, path, model_path=None):
+
+        self.path = path
+        self.model_path = model_path
+        self.meta = read_meta(path)
+
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, name + ".npy"), mmap_mode="r"))
+
+        self.depth = self.meta["depth"]
+        self.classes_ = np.array([0, 1])
+
+        self._sklearn = None
+        self._sklearn_lock = threading.Lock()
+
+    def sklearn_model(self):
+
+        with self._sklearn_lock:
+
+            if self._sklearn is None:
+                self._sklearn = joblib.load(self.model_path)["model"]
+
+            return self._sklearn
+
+    # level-wise traversal: every (tree, row) pair advances one level
+    # per step, all trees at once. Rows go in blocks so the
+    # (trees x rows) state stays small.
+
+    def predict_proba(self, X):
+
+        if self.model_path and len(X) > SKLEARN_ROWS:
+
+            # rows come in the bundle's feature order, without names
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message="X does not have valid feature names")
+                return self.sklearn_model().predict_proba(X)
+
+        # sklearn validates X as float32 before walking the trees
+        X = np.asarray(X, dtype=np.float32)
+
+        if len(X) > BLOCK_ROWS:
+            return np.vstack([
+                self.predict_proba(X[i:i + BLOCK_ROWS])
+                for i in range(0, len(X), BLOCK_ROWS)
+            ])
+
+        flat = X.ravel()
+        row_offset = np.arange(len(X), dtype=np.int32) * X.shape[1]
+
+        # children flattened as [left0, right0, left1, right1, ...]
+        children = self.children.reshape(-1)
+
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+
+        for _ in range(self.depth):
+
+            go_right = flat[row_offset + self.feature[node]] > self.threshold[node]
+
+            node = children[2 * node + go_right]
+
+        # reduced over the tree axis in tree order, like sklearn's
+        # running sum, so the result is bit-identical
+        total = np.add.reduce(self.value[node], axis=0)
+
+        total /= len(self.roots)
+
+        return total
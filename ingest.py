@@ -0,0 +1,179 @@
+import json
+from collections import Counter
+from datetime import datetime
+
+import jobs
+from features import record_activity
+
+# =========================================================
+# BULK REVIEW INGESTION (POST /reviews/bulk)
+# one JSON object per line:
+#
+#   {"product_id": 3, "user_id": 17, "rating": 5, "review_text": "...",
+#    "created_at": "2025-01-31T12:00:00"}        <- optional, default now
+#
+# valid lines are inserted with one executemany, the activity
+# counters and products.review_count are bumped and every touched
+# product gets a scoring job, all in a single transaction. Scoring happens later (worker.py, or
+# worker.BackgroundScorer inside the app), so the request returns as
+# soon as the rows are committed. Invalid lines are reported back by
+# line number and skipped; they never fail the whole batch.
+# =========================================================
+
+MAX_LINES = 10000
+MAX_TEXT_LENGTH = 5000
+
+IN_CHUNK_SIZE = 1000
+
+FIELDS = ("product_id", "user_id", "rating", "review_text", "created_at")
+
+
+def _chunks(values, size):
+
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _positive_int(value, name):
+
+    # bool is an int subclass: true/false are not ids
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError(f"{name} must be a positive integer")
+
+    return value
+
+
+def validate(record, now):
+
+    if not isinstance(record, dict):
+        raise ValueError("line is not a JSON object")
+
+    unknown = sorted(set(record) - set(FIELDS))
+
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+
+    rating = record.get("rating")
+
+    if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+        raise ValueError("rating must be an integer from 1 to 5")
+
+    text = record.get("review_text")
+
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("review_text must be a non-empty string")
+
+    if len(text) > MAX_TEXT_LENGTH:
+        raise ValueError(f"review_text is longer than {MAX_TEXT_LENGTH} characters")
+
+    created_at = record.get("created_at")
+
+    if created_at is None:
+        created_at = now
+    else:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise ValueError("created_at must be an ISO 8601 datetime")
+
+        if created_at.tzinfo is not None or created_at > now:
+            raise ValueError("created_at must be a naive local time, not in the future")
+
+    return {
+        "product_id": _positive_int(record.get("product_id"), "product_id"),
+        "user_id": _positive_int(record.get("user_id"), "user_id"),
+        "rating": rating,
+        "text": text,
+        "created_at": created_at
+    }
+
+
+# returns (reviews, errors); errors are {"line": n, "error": msg} with
+# 1-based line numbers, blank lines are ignored
+
+def parse_jsonl(data, now=None):
+
+    now = now or datetime.now()
+
+    reviews = []
+    errors = []
+
+    for number, line in enumerate(data.splitlines(), 1):
+
+        if not line.strip():
+            continue
+
+        try:
+            review = validate(json.loads(line), now)
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            errors.append({"line": number, "error": str(e)})
+            continue
+
+        review["line"] = number
+        reviews.append(review)
+
+    return reviews, errors
+
+
+def existing_products(cur, product_ids):
+
+    found = set()
+
+    for chunk in _chunks(sorted(product_ids), IN_CHUNK_SIZE):
+
+        placeholders = ",".join(["%s"] * len(chunk))
+
+        cur.execute(f"SELECT id FROM products WHERE id IN ({placeholders})", tuple(chunk))
+        found.update(row[0] for row in cur.fetchall())
+
+    return found
+
+
+# insert validated reviews, bump counters and queue scoring. Reviews of
+# unknown products are moved to errors. Caller commits (or rolls back:
+# nothing is half-written). Returns the accepted reviews.
+
+def ingest(cur, reviews, errors):
+
+    if not reviews:
+        return []
+
+    known = existing_products(cur, {r["product_id"] for r in reviews})
+
+    accepted = []
+
+    for r in reviews:
+        if r["product_id"] in known:
+            accepted.append(r)
+        else:
+            errors.append({"line": r["line"], "error": f"unknown product_id {r['product_id']}"})
+
+    errors.sort(key=lambda e: e["line"])
+
+    if not accepted:
+        return []
+
+    # MySQLdb turns this into multi-row INSERT ... VALUES (...), (...)
+    cur.executemany("""
+        INSERT INTO reviews (product_id, user_id, rating, review_text, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [
+        (r["product_id"], r["user_id"], r["rating"], r["text"], r["created_at"])
+        for r in accepted
+    ])
+
+    record_activity(cur, accepted)
+
+    # in id order, so concurrent batches lock products the same way
+    per_product = Counter(r["product_id"] for r in accepted)
+
+    cur.executemany(
+        "UPDATE products SET review_count = review_count + %s WHERE id = %s",
+        [(count, product_id) for product_id, count in sorted(per_product.items())]
+    )
+
+    for product_id in sorted({r["product_id"] for r in accepted}):
+        jobs.enqueue(cur, product_id, jobs.REVIEW_WRITTEN)
+
+    return accepted
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+# =========================================================
+# SCORING JOB QUEUE (scoring_jobs table)
+# producers: app.py; consumer: worker.py
+# =========================================================
+
+REVIEW_WRITTEN = "review_written"
+RESCORE_PRODUCT = "rescore_product"
+
+MAX_ATTEMPTS = 3
+
+
+# queue a job unless the product already has one waiting; caller commits
+def enqueue(cur, product_id, kind=RESCORE_PRODUCT):
+
+    cur.execute("""
+        INSERT INTO scoring_jobs (product_id, kind, status, created_at)
+        SELECT %s, %s, 'pending', %s
+        FROM DUAL
+        WHERE NOT EXISTS (
+            SELECT 1 FROM scoring_jobs
+            WHERE product_id = %s AND status = 'pending'
+        )
+    """, (product_id, kind, datetime.now(), product_id))
+
+
+# claim up to limit pending jobs; SKIP LOCKED lets several workers
+# poll the same table without handing out a job twice
+def claim(conn, limit):
+
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT id, product_id FROM scoring_jobs
+        WHERE status = 'pending'
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """, (limit,))
+
+    jobs = cur.fetchall()
+
+    if jobs:
+
+        placeholders = ",".join(["%s"] * len(jobs))
+
+        cur.execute(f"""
+            UPDATE scoring_jobs
+            SET status = 'running', started_at = %s, attempts = attempts + 1
+            WHERE id IN ({placeholders})
+        """, (datetime.now(), *[j[0] for j in jobs]))
+
+    conn.commit()
+    cur.close()
+
+    return jobs
+
+
+def finish(cur, job_ids):
+
+    if not job_ids:
+        return
+
+    placeholders = ",".join(["%s"] * len(job_ids))
+
+    cur.execute(f"""
+        UPDATE scoring_jobs
+        SET status = 'done', finished_at = %s, error = NULL
+        WHERE id IN ({placeholders})
+    """, (datetime.now(), *job_ids))
+
+
+# failed jobs go back to pending until MAX_ATTEMPTS is reached
+def fail(cur, job_ids, error):
+
+    if not job_ids:
+        return
+
+    placeholders = ",".join(["%s"] * len(job_ids))
+
+    cur.execute(f"""
+        UPDATE scoring_jobs
+        SET status = IF(attempts >= %s, 'failed', 'pending'),
+            finished_at = %s,
+            error = %s
+        WHERE id IN ({placeholders})
+    """, (MAX_ATTEMPTS, datetime.now(), str(error)[:255], *job_ids))
+
+
+# jobs left 'running' by a worker that died
+def requeue_stale(cur, older_than):
+
+    cur.execute("""
+        UPDATE scoring_jobs
+        SET status = 'pending'
+        WHERE status = 'running' AND started_at < %s
+    """, (datetime.now() - timedelta(seconds=older_than),))
+
+    return cur.rowcount
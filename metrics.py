@@ -0,0 +1,331 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+# =========================================================
+# METRICS (Prometheus text format, GET /metrics)
+# counters and histograms kept in process memory, thread-safe:
+#
+#   with metrics.span("sentiment"):       stage timing
+#       ...
+#   cur = metrics.TimedCursor(cur)        per-query counts / timing
+#
+# a span is recorded in trueinsight_stage_seconds{stage=...} and,
+# while a request trace is active (start_trace), in that request's
+# stage breakdown as well. Spans nest: a stage's time includes the
+# queries and inner stages it ran. Worker processes keep their own
+# numbers; only the app process serves them.
+# =========================================================
+
+# seconds; finer at the low end than the Prometheus defaults, most
+# stages take well under 10ms
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+
+    pairs = [*zip(names, values), *extra]
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# name, kind, help, samples [(labels dict, value)] -> exposition lines;
+# for values read from elsewhere at scrape time (pool, caches)
+def sample_lines(name, kind, help, samples):
+
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels, labels.values())} {_number(value)}")
+
+    return lines
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self):
+
+        with self._lock:
+            values = sorted(self._values.items())
+
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in values]
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+        # labels -> [per-bucket counts (last = above every bound), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+
+        i = bisect_left(self.buckets, value)
+
+        with self._lock:
+
+            entry = self._values.get(labels)
+
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+            entry[0][i] += 1
+            entry[1] += value
+
+    def lines(self):
+
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        lines = []
+
+        for labels, (counts, total) in values:
+
+            cumulative = 0
+
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = _labels(self.labelnames, labels, [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+
+        return lines
+
+
+# =========================================================
+# HOT-PATH METRICS
+# =========================================================
+
+STAGE_SECONDS = Histogram(
+    "trueinsight_stage_seconds",
+    "Time spent in each stage of the product page and review scoring",
+    ["stage"]
+)
+
+QUERIES = Counter(
+    "trueinsight_db_queries_total",
+    "Database statements executed, by statement and first table",
+    ["statement", "table"]
+)
+
+QUERY_SECONDS = Histogram(
+    "trueinsight_db_query_seconds",
+    "Database statement time including fetching the result, by statement and first table",
+    ["statement", "table"]
+)
+
+INFERENCE_SECONDS = Histogram(
+    "trueinsight_model_inference_seconds",
+    "Time of one predict_proba call over a batch of reviews"
+)
+
+INFERENCE_BATCH = Histogram(
+    "trueinsight_model_inference_batch_size",
+    "Reviews per predict_proba call",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+
+REQUEST_SECONDS = Histogram(
+    "trueinsight_http_request_seconds",
+    "Request time by endpoint and status",
+    ["endpoint", "status"]
+)
+
+REGISTRY = [STAGE_SECONDS, QUERIES, QUERY_SECONDS, INFERENCE_SECONDS, INFERENCE_BATCH, REQUEST_SECONDS]
+
+
+def render():
+
+    lines = []
+
+    for metric in REGISTRY:
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"]
+        lines += metric.lines()
+
+    return lines
+
+
+# =========================================================
+# REQUEST TRACES (stage breakdown of one request)
+# =========================================================
+
+class Trace:
+
+    def __init__(self):
+
+        self.start = time.perf_counter()
+        self.stages = {}       # stage -> [calls, seconds], in first-seen order
+
+    def add(self, stage, seconds):
+
+        entry = self.stages.setdefault(stage, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    # Server-Timing header value: stage;dur=<ms>;desc="<calls> calls"
+    def server_timing(self):
+
+        entries = [
+            f'{stage};dur={seconds * 1000:.2f};desc="{calls} call{"s" if calls != 1 else ""}"'
+            for stage, (calls, seconds) in self.stages.items()
+        ]
+
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.2f}")
+
+        return ", ".join(entries)
+
+
+_trace = ContextVar("trace", default=None)
+
+
+# returns the token for end_trace
+def start_trace():
+
+    return _trace.set(Trace())
+
+
+# the active trace, or None
+def current_trace():
+
+    return _trace.get()
+
+
+def end_trace(token):
+
+    _trace.reset(token)
+
+
+def _record(stage, seconds):
+
+    trace = _trace.get()
+
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+# histogram: record there (unlabelled) instead of in STAGE_SECONDS
+@contextmanager
+def span(stage, histogram=None):
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+
+        if histogram is None:
+            STAGE_SECONDS.observe(elapsed, stage)
+        else:
+            histogram.observe(elapsed)
+
+        _record(stage, elapsed)
+
+
+# =========================================================
+# QUERY TIMING
+# statements are labelled by their verb and first table, e.g.
+# ("SELECT", "reviews"): few enough label values for Prometheus
+# whatever the parameters or IN-list lengths are
+# =========================================================
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+`?(\w+)", re.I)
+
+
+@lru_cache(maxsize=512)
+def query_label(query):
+
+    words = query.split(None, 1)
+
+    if not words:
+        return "", ""
+
+    match = _TABLE.search(query)
+
+    return words[0].upper(), match.group(1).lower() if match else ""
+
+
+class TimedCursor:
+
+    def __init__(self, cur):
+
+        self.cur = cur
+
+    def _timed(self, method, query, *args):
+
+        start = time.perf_counter()
+
+        try:
+            return method(query, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+
+            label = query_label(query)
+
+            QUERIES.inc(*label)
+            QUERY_SECONDS.observe(elapsed, *label)
+
+            _record("db", elapsed)
+
+    def execute(self, query, *args):
+
+        return self._timed(self.cur.execute, query, *args)
+
+    def executemany(self, query, *args):
+
+        return self._timed(self.cur.executemany, query, *args)
+
+    # fetch*, close, rowcount, lastrowid, description ...
+    def __getattr__(self, name):
+
+        return getattr(self.cur, name)
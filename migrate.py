@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+from datetime import datetime
+
+# =========================================================
+# SCHEMA MIGRATIONS
+# applies migrations/NNN_name.sql in order and records each one in
+# schema_migrations, so every database knows which it has:
+#
+#   python migrate.py status           applied / pending, changed files
+#   python migrate.py up               apply everything pending
+#   python migrate.py up --to 006      ... up to and including 006
+#   python migrate.py baseline 005     record 000-005 as applied without
+#                                      running them (databases that were
+#                                      set up by hand before this tool)
+#
+# MySQL commits DDL statement by statement, so a migration that fails
+# halfway is not rolled back: fix the file, undo what it did, rerun.
+# =========================================================
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_FILE = re.compile(r"^(\d{3})_(\w+)\.sql$")
+
+
+def available(directory=MIGRATIONS_DIR):
+
+    migrations = []
+
+    for name in sorted(os.listdir(directory)):
+
+        match = _FILE.match(name)
+
+        if not match:
+            continue
+
+        path = os.path.join(directory, name)
+
+        with open(path, "rb") as f:
+            checksum = hashlib.sha1(f.read()).hexdigest()
+
+        migrations.append({
+            "version": match.group(1),
+            "name": match.group(2),
+            "path": path,
+            "checksum": checksum
+        })
+
+    versions = [m["version"] for m in migrations]
+
+    if len(set(versions)) != len(versions):
+        sys.exit("❌ two migration files share a version number")
+
+    return migrations
+
+
+# statements of a migration file: "--" comments dropped, split on
+# semicolons that end a line (the files hold plain DDL/DML only)
+def statements(path):
+
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if not line.lstrip().startswith("--")]
+
+    return [s.strip() for s in re.split(r";\s*$", "".join(lines), flags=re.M) if s.strip()]
+
+
+def ensure_table(cur):
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     VARCHAR(16)   NOT NULL,
+            name        VARCHAR(255)  NOT NULL,
+            checksum    CHAR(40)      NOT NULL,
+            applied_at  DATETIME      NOT NULL,
+            PRIMARY KEY (version)
+        )
+    """)
+
+
+def applied(cur):
+
+    cur.execute("SELECT version, checksum, applied_at FROM schema_migrations")
+
+    return {row[0]: {"checksum": row[1], "applied_at": row[2]} for row in cur.fetchall()}
+
+
+def record(cur, migration):
+
+    cur.execute("""
+        INSERT INTO schema_migrations (version, name, checksum, applied_at)
+        VALUES (%s, %s, %s, %s)
+    """, (migration["version"], migration["name"], migration["checksum"], datetime.now()))
+
+
+def status(conn):
+
+    cur = conn.cursor()
+    ensure_table(cur)
+
+    done = applied(cur)
+
+    for m in available():
+
+        entry = done.get(m["version"])
+
+        if entry is None:
+            state = "pending"
+        elif entry["checksum"] != m["checksum"]:
+            state = f"applied {entry['applied_at']:%Y-%m-%d %H:%M}, FILE CHANGED since"
+        else:
+            state = f"applied {entry['applied_at']:%Y-%m-%d %H:%M}"
+
+        print(f"{m['version']}  {m['name']:<32} {state}")
+
+    cur.close()
+
+
+def up(conn, target=None):
+
+    cur = conn.cursor()
+    ensure_table(cur)
+    conn.commit()
+
+    done = applied(cur)
+
+    count = 0
+
+    for m in available():
+
+        if target is not None and m["version"] > target:
+            break
+
+        if m["version"] in done:
+            continue
+
+        print(f"applying {m['version']}_{m['name']}...")
+
+        for statement in statements(m["path"]):
+            cur.execute(statement)
+
+        record(cur, m)
+        conn.commit()
+
+        count += 1
+
+    cur.close()
+
+    print(f"{count} migration(s) applied" if count else "schema is up to date")
+
+    return count
+
+
+def baseline(conn, target):
+
+    cur = conn.cursor()
+    ensure_table(cur)
+
+    done = applied(cur)
+
+    marked = [m for m in available() if m["version"] <= target and m["version"] not in done]
+
+    for m in marked:
+        record(cur, m)
+
+    conn.commit()
+    cur.close()
+
+    print(f"recorded {len(marked)} migration(s) as applied without running them")
+
+
+if __name__ == "__main__":
+
+    import database
+
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="list migrations and whether they are applied")
+
+    apply = commands.add_parser("up", help="apply pending migrations")
+    apply.add_argument("--to", help="last version to apply, e.g. 006")
+
+    mark = commands.add_parser("baseline", help="record migrations as applied without running them")
+    mark.add_argument("version", help="last version already present, e.g. 005")
+
+    args = parser.parse_args()
+
+    conn = database.connect()
+
+    if args.command == "status":
+        status(conn)
+    elif args.command == "up":
+        up(conn, args.to.zfill(3) if args.to else None)
+    else:
+        baseline(conn, args.version.zfill(3))
+
+    conn.close()
@@ -0,0 +1,41 @@
+-- =========================================================
+-- BASE SCHEMA
+-- the tables the app was built on, before numbered migrations
+-- existed. A database created by hand already has them: mark it
+-- with `python migrate.py baseline 000` instead of applying this.
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS users (
+    id             INT           NOT NULL AUTO_INCREMENT,
+    email          VARCHAR(255)  NOT NULL,
+    password_hash  VARCHAR(255)  NOT NULL,
+    created_at     DATETIME      NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_users_email (email)
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id           INT            NOT NULL AUTO_INCREMENT,
+    name         VARCHAR(255)   NOT NULL,
+    category     VARCHAR(64)    NULL,
+    description  TEXT           NULL,
+    price        DECIMAL(10,2)  NULL,
+    raw_rating   DECIMAL(3,2)   NULL,
+    image_url    VARCHAR(512)   NULL,
+    PRIMARY KEY (id)
+);
+
+-- user_id is the reviewer's id in the review source, not
+-- necessarily an app account, so it has no foreign key
+CREATE TABLE IF NOT EXISTS reviews (
+    id           INT       NOT NULL AUTO_INCREMENT,
+    product_id   INT       NOT NULL,
+    user_id      INT       NOT NULL,
+    rating       TINYINT   NOT NULL,
+    review_text  TEXT      NOT NULL,
+    created_at   DATETIME  NOT NULL,
+    PRIMARY KEY (id),
+    CONSTRAINT fk_reviews_product
+        FOREIGN KEY (product_id) REFERENCES products (id)
+        ON DELETE CASCADE
+);
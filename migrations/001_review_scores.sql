@@ -0,0 +1,18 @@
+-- =========================================================
+-- PRECOMPUTED REVIEW SCORES
+-- one row per (review, model version); a new model version
+-- simply leaves old rows behind and reviews get rescored lazily
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS review_scores (
+    review_id      INT          NOT NULL,
+    model_version  VARCHAR(64)  NOT NULL,
+    prob_fake      DOUBLE       NULL,
+    suspicious     TINYINT(1)   NOT NULL,
+    reasons        VARCHAR(255) NOT NULL,
+    scored_at      DATETIME     NOT NULL,
+    PRIMARY KEY (review_id, model_version),
+    CONSTRAINT fk_review_scores_review
+        FOREIGN KEY (review_id) REFERENCES reviews (id)
+        ON DELETE CASCADE
+);
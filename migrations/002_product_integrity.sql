@@ -0,0 +1,19 @@
+-- =========================================================
+-- MATERIALIZED PER-PRODUCT INTEGRITY AGGREGATES
+-- counts and rating sums over the reviews scored with
+-- model_version; maintained by scoring.record_scores
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS product_integrity (
+    product_id          INT          NOT NULL,
+    model_version       VARCHAR(64)  NOT NULL,
+    total               INT          NOT NULL DEFAULT 0,
+    genuine             INT          NOT NULL DEFAULT 0,
+    rating_sum          INT          NOT NULL DEFAULT 0,
+    genuine_rating_sum  INT          NOT NULL DEFAULT 0,
+    updated_at          DATETIME     NOT NULL,
+    PRIMARY KEY (product_id),
+    CONSTRAINT fk_product_integrity_product
+        FOREIGN KEY (product_id) REFERENCES products (id)
+        ON DELETE CASCADE
+);
@@ -0,0 +1,20 @@
+-- =========================================================
+-- SCORING JOB QUEUE
+-- written by the web app (review written / product needs
+-- rescoring), consumed by worker.py
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS scoring_jobs (
+    id           BIGINT       NOT NULL AUTO_INCREMENT,
+    product_id   INT          NOT NULL,
+    kind         VARCHAR(32)  NOT NULL,
+    status       VARCHAR(16)  NOT NULL DEFAULT 'pending',
+    attempts     INT          NOT NULL DEFAULT 0,
+    error        VARCHAR(255) NULL,
+    created_at   DATETIME     NOT NULL,
+    started_at   DATETIME     NULL,
+    finished_at  DATETIME     NULL,
+    PRIMARY KEY (id),
+    KEY idx_scoring_jobs_status (status, id),
+    KEY idx_scoring_jobs_product (product_id, status)
+);
@@ -0,0 +1,27 @@
+-- =========================================================
+-- DUPLICATE DETECTION INDEX (see duplicates.py)
+-- exact duplicates: review_fingerprints.text_hash
+-- near duplicates: MinHash LSH bands in review_lsh_buckets
+-- backfill existing reviews with: python duplicates.py
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS review_fingerprints (
+    review_id  INT             NOT NULL,
+    text_hash  BIGINT          NOT NULL,
+    signature  VARBINARY(256)  NULL,
+    PRIMARY KEY (review_id),
+    KEY idx_review_fingerprints_hash (text_hash),
+    CONSTRAINT fk_review_fingerprints_review
+        FOREIGN KEY (review_id) REFERENCES reviews (id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS review_lsh_buckets (
+    bucket     BIGINT  NOT NULL,
+    review_id  INT     NOT NULL,
+    PRIMARY KEY (bucket, review_id),
+    KEY idx_review_lsh_buckets_review (review_id),
+    CONSTRAINT fk_review_lsh_buckets_review
+        FOREIGN KEY (review_id) REFERENCES reviews (id)
+        ON DELETE CASCADE
+);
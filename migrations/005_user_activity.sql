@@ -0,0 +1,20 @@
+-- =========================================================
+-- REVIEWER ACTIVITY COUNTERS
+-- reviews per user and per (user, day), bumped in the same
+-- transaction as the review insert (features.record_activity)
+-- and read by primary key when extracting features
+-- build / reconcile from existing reviews with: python features.py
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS user_activity (
+    user_id       INT   NOT NULL,
+    review_count  INT   NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id)
+);
+
+CREATE TABLE IF NOT EXISTS user_daily_activity (
+    user_id       INT   NOT NULL,
+    day           DATE  NOT NULL,
+    review_count  INT   NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
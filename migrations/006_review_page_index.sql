@@ -0,0 +1,8 @@
+-- =========================================================
+-- REVIEW PAGES (scoring.fetch_review_page)
+-- keyset pagination on (created_at, id) within a product:
+-- every page is a short range scan of this index, newest first
+-- =========================================================
+
+ALTER TABLE reviews
+    ADD INDEX idx_reviews_product_created (product_id, created_at, id);
@@ -0,0 +1,23 @@
+-- =========================================================
+-- CATALOG BROWSING (/home, see catalog.py)
+-- review_rating / filtered_rating mirror product_integrity
+-- (scoring.sync_product_ratings) so that every category filter
+-- and sort of the catalog is a range on one of these indexes;
+-- id completes each key for the keyset cursor.
+-- filtered_rating 0 = no genuine reviews yet
+-- =========================================================
+
+ALTER TABLE products
+    ADD COLUMN review_rating   DECIMAL(3,2) NOT NULL DEFAULT 0,
+    ADD COLUMN filtered_rating DECIMAL(3,2) NOT NULL DEFAULT 0,
+    ADD INDEX idx_products_category (category, id),
+    ADD INDEX idx_products_review_rating (review_rating, id),
+    ADD INDEX idx_products_filtered_rating (filtered_rating, id),
+    ADD INDEX idx_products_category_review_rating (category, review_rating, id),
+    ADD INDEX idx_products_category_filtered_rating (category, filtered_rating, id);
+
+-- seed from the aggregates that already exist
+UPDATE products p
+LEFT JOIN product_integrity i ON i.product_id = p.id
+SET p.review_rating = IF(i.total > 0, ROUND(i.rating_sum / i.total, 2), COALESCE(p.raw_rating, 0)),
+    p.filtered_rating = IF(i.genuine > 0, ROUND(i.genuine_rating_sum / i.genuine, 2), 0);
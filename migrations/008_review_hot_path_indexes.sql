@@ -0,0 +1,19 @@
+-- =========================================================
+-- COVERING INDEXES FOR THE REMAINING REVIEW SCANS
+-- checked with: python check_indexes.py
+--
+-- (user_id, created_at): the activity counter rebuild
+--   (features.backfill_activity) groups a range of user ids by
+--   day; the index holds every column it reads. Per-day counts
+--   must use the sargable form
+--       user_id = %s AND created_at >= %s AND created_at < %s
+--   never DATE(created_at) = ..., which cannot use the index.
+-- (product_id, rating): the integrity recount
+--   (scoring.rebuild_product_integrity) reads only product_id,
+--   rating and the primary key (implicit in every InnoDB index).
+-- the product pages use idx_reviews_product_created (006).
+-- =========================================================
+
+ALTER TABLE reviews
+    ADD INDEX idx_reviews_user_created (user_id, created_at),
+    ADD INDEX idx_reviews_product_rating (product_id, rating);
@@ -0,0 +1,21 @@
+-- =========================================================
+-- CATALOG RATING FOR NEW PRODUCTS
+-- review_rating is only written by scoring.sync_product_ratings,
+-- i.e. once a review is scored, so products inserted after 007
+-- stayed at 0: shown as "0 / 5" on /home and sorted last, where
+-- they used to show raw_rating. New rows start from raw_rating,
+-- the same fallback sync_product_ratings applies, and the ones
+-- inserted since 007 are seeded.
+-- (with binary logging on, creating a trigger needs SUPER or
+-- log_bin_trust_function_creators)
+-- =========================================================
+
+CREATE TRIGGER products_seed_review_rating
+BEFORE INSERT ON products
+FOR EACH ROW
+SET NEW.review_rating = IF(NEW.review_rating = 0, COALESCE(NEW.raw_rating, 0), NEW.review_rating);
+
+UPDATE products p
+LEFT JOIN product_integrity i ON i.product_id = p.id
+SET p.review_rating = COALESCE(p.raw_rating, 0)
+WHERE i.product_id IS NULL AND p.review_rating = 0;
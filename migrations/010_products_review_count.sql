@@ -0,0 +1,19 @@
+-- =========================================================
+-- REVIEW COUNT PER PRODUCT
+-- the product page is only final (cached, no rescore job) once
+-- product_integrity counts every review of the product; comparing
+-- against this column instead of COUNT(*) keeps each page O(page).
+-- Bumped by ingest.ingest in the same transaction as the reviews;
+-- scoring.rebuild_product_integrity recounts it (deleted reviews).
+-- =========================================================
+
+ALTER TABLE products
+    ADD COLUMN review_count INT NOT NULL DEFAULT 0;
+
+UPDATE products p
+JOIN (
+    SELECT product_id, COUNT(*) AS n
+    FROM reviews
+    GROUP BY product_id
+) c ON c.product_id = p.id
+SET p.review_count = c.n;
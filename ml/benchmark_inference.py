@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from export_forest import check_rows
+from forest import CompactForest, forest_dir
+
+# -----------------------------
+# INFERENCE LATENCY VS BATCH SIZE
+# sklearn predict_proba against the compact forest (forest.py)
+# on the same rows; run export_forest.py first.
+#
+#   python benchmark_inference.py --repeats 50
+# -----------------------------
+
+MODEL_PATH = "../model/review_model.pkl"
+
+BATCH_SIZES = [1, 8, 32, 128, 512, 2048, 8192]
+
+
+def median_latency(predict, X, repeats):
+
+    timings = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+
+    return float(np.median(timings))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark forest inference latency")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    bundle = joblib.load(args.model)
+
+    sklearn_model = bundle["model"]
+    compact = CompactForest(forest_dir(args.model))
+
+    rows = check_rows(bundle)
+
+    print(f"{'batch':>6} {'sklearn ms':>11} {'compact ms':>11} {'speedup':>8} {'compact rows/s':>15}")
+
+    for size in BATCH_SIZES:
+
+        X = rows[np.arange(size) % len(rows)]
+
+        if not np.array_equal(sklearn_model.predict_proba(X), compact.predict_proba(X)):
+            sys.exit(f"❌ predictions differ at batch size {size}")
+
+        sklearn_time = median_latency(sklearn_model.predict_proba, X, args.repeats)
+        compact_time = median_latency(compact.predict_proba, X, args.repeats)
+
+        print(
+            f"{size:>6} {sklearn_time * 1000:>11.2f} {compact_time * 1000:>11.2f} "
+            f"{sklearn_time / compact_time:>7.1f}x {size / compact_time:>15.0f}"
+        )
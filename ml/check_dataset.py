@@ -1,7 +1,9 @@
 import pandas as pd
 
-df = pd.read_csv("final_review_dataset.csv")
+import feature_store
 
-print("Dataset size:", len(df))
+dataset = feature_store.load(feature_store.FINAL)
+
+print("Dataset size:", len(dataset))
 print("\nLabel distribution:")
-print(df["label"].value_counts())
\ No newline at end of file
+print(pd.Series(dataset.column("label")).value_counts())
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import pandas as pd
+from textblob import TextBlob
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sentiment import polarities
+
+# -----------------------------
+# fast sentiment vs TextBlob
+# usage: python check_sentiment.py [csv] [text column]
+# -----------------------------
+
+TOLERANCE = 1e-9
+
+path = sys.argv[1] if len(sys.argv) > 1 else "kaggle_data/fake_reviews_dataset.csv"
+
+df = pd.read_csv(path)
+
+column = sys.argv[2] if len(sys.argv) > 2 else df.columns[0]
+
+if pd.api.types.is_numeric_dtype(df[column]):
+    sys.exit(f"{path}: column '{column}' holds no review text")
+
+texts = df[column].astype(str).tolist()
+
+print("Texts:", len(texts))
+
+start = time.perf_counter()
+expected = [TextBlob(t).sentiment.polarity for t in texts]
+textblob_time = time.perf_counter() - start
+
+start = time.perf_counter()
+actual = polarities(texts)
+fast_time = time.perf_counter() - start
+
+diffs = [abs(a - b) for a, b in zip(expected, actual)]
+mismatches = sum(d > TOLERANCE for d in diffs)
+
+print(f"TextBlob: {textblob_time:.2f}s")
+print(f"Fast:     {fast_time:.2f}s ({textblob_time / max(fast_time, 1e-9):.1f}x)")
+print("Max abs difference:", max(diffs) if diffs else 0.0)
+print("Mismatches:", mismatches)
+
+if mismatches:
+    sys.exit(1)
+
+print("\n✅ Sentiment scores match TextBlob")
@@ -1,151 +1,443 @@
-import mysql.connector
+import argparse
+import os
+import shutil
+import sys
+import time
+import numpy as np
 import pandas as pd
-from textblob import TextBlob
 from collections import Counter
-from sklearn.metrics import f1_score
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import database
+import feature_store
+from duplicates import index_reviews, fetch_duplicate_flags
+from features import fetch_user_activity
+from feature_extraction import (
+    extract_review_rows,
+    chunked,
+    ordered_map,
+    CHUNK_SIZE
+)
 
 # -----------------------------
-# DB CONNECTION
+# SETTINGS
 # -----------------------------
 
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="password",
-    database="trueinsight"
-)
+OUTPUTS = {
+    "store": feature_store.SYSTEM,
+    "csv": "review_dataset.csv",
+    "parquet": "review_dataset.parquet"
+}
+
+# features + weak supervision score, before labelling
+SCORED = {
+    "store": feature_store.SYSTEM + "_scored",
+    "csv": "review_dataset.scored.csv",
+    "parquet": "review_dataset.scored.parquet"
+}
+
+COLUMNS = [
+    "review_length",
+    "word_count",
+    "sentiment",
+    "rating",
+    "duplicate_flag",
+    "generic_flag",
+    "user_review_count",
+    "daily_review_count",
+    "score"
+]
+
+THRESHOLDS = range(1, 6)
+
+# -----------------------------
+# DB CHECKS
+# connections come from ../database.py (settings in ../config.py)
+# -----------------------------
+
+# the activity features come from the maintained counters; a build on
+# counters that disagree with reviews would train on wrong features
+def check_activity_counters(db):
+
+    cursor = db.cursor()
 
-cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT COUNT(*) FROM reviews")
+    reviews = cursor.fetchone()[0]
 
-cursor.execute("""
-SELECT id, user_id, rating, review_text, created_at
-FROM reviews
-""")
+    cursor.execute("SELECT COALESCE(SUM(review_count), 0) FROM user_activity")
+    counted = int(cursor.fetchone()[0])
+
+    cursor.close()
+
+    if counted != reviews:
+        sys.exit(
+            f"user_activity counts {counted} reviews but the table has {reviews}; "
+            f"rebuild the counters first: python ../features.py"
+        )
 
-reviews = cursor.fetchall()
 
 # -----------------------------
-# PREPROCESS REVIEWS
+# FEATURES (fanned out over --workers processes)
 # -----------------------------
 
-texts = [r["review_text"].lower().strip() for r in reviews]
-text_counts = Counter(texts)
+# only the activity entries a chunk needs are shipped to the worker
+# process with it
 
-rows = []
-scores = []
+def chunk_task(chunk, duplicate_flags, user_counts, daily_counts):
 
-print("\nExtracting features from system reviews...\n")
+    users = {r["user_id"] for r in chunk}
 
-for r in reviews:
+    return (
+        chunk,
+        {r["id"]: duplicate_flags.get(r["id"]) for r in chunk},
+        {u: user_counts[u] for u in users if u in user_counts},
+        {k: c for k, c in daily_counts.items() if k[0] in users}
+    )
 
-    text = r["review_text"]
-    sentiment = TextBlob(text).sentiment.polarity
 
-    word_count = len(text.split())
-    review_length = len(text)
+def review_texts(chunk):
 
-    duplicate_flag = 1 if text.lower().strip() in text_counts and text_counts[text.lower().strip()] > 1 else 0
+    return [{"id": r["id"], "text": r["review_text"]} for r in chunk]
 
-    generic_flag = 1 if text.lower().strip() in ["good", "nice", "excellent", "very good"] else 0
 
-    # Total reviews by user
-    cursor.execute(
-        "SELECT COUNT(*) AS cnt FROM reviews WHERE user_id=%s",
-        (r["user_id"],)
-    )
-    user_review_count = cursor.fetchone()["cnt"]
+def load_kaggle_labels():
+
+    labels = feature_store.load(feature_store.KAGGLE).column("label")
+
+    return (labels == 1).astype(int)
+
+
+# -----------------------------
+# IN-MEMORY BUILD (small tables)
+# -----------------------------
+
+def build_in_memory(db, chunk_size, fmt, workers, scored):
+
+    cursor = database.dict_cursor(db)
+
+    cursor.execute("""
+    SELECT id, user_id, rating, review_text, created_at
+    FROM reviews
+    """)
+
+    reviews = cursor.fetchall()
+
+    # reviewer activity for the whole table from the maintained
+    # counters (same source app.py uses when scoring)
+    activity_cursor = db.cursor()
+    user_counts, daily_counts = fetch_user_activity(activity_cursor)
+
+    # corpus-wide duplicate / near-duplicate flags from the shared
+    # fingerprint index; new reviews are indexed on the way
+    print("\nLooking up duplicate reviews...")
+
+    duplicate_flags = {}
+
+    for chunk in chunked(reviews, chunk_size):
+        index_reviews(activity_cursor, review_texts(chunk))
+
+    for chunk in chunked(reviews, chunk_size):
+        duplicate_flags.update(fetch_duplicate_flags(activity_cursor, review_texts(chunk)))
+
+    db.commit()
+    activity_cursor.close()
+
+    print(f"Duplicate reviews: {sum(1 for f in duplicate_flags.values() if f)}")
 
-    # Reviews by same user on same day
-    cursor.execute(
-        """
-        SELECT COUNT(*) AS cnt
+    print("\nExtracting features from system reviews...\n")
+
+    rows = []
+
+    for chunk_rows in ordered_map(
+        extract_review_rows,
+        (chunk_task(chunk, duplicate_flags, user_counts, daily_counts)
+         for chunk in chunked(reviews, chunk_size)),
+        workers
+    ):
+        rows.extend(chunk_rows)
+
+    writer = ChunkWriter(scored, fmt)
+    writer.write(pd.DataFrame(rows, columns=COLUMNS))
+    writer.close()
+
+
+# -----------------------------
+# STREAMING BUILD (large tables)
+# keyset pagination on reviews.id, features per chunk, output
+# appended chunk by chunk; memory is bounded by the chunk size
+# -----------------------------
+
+def iter_review_chunks(db, columns, chunk_size):
+
+    cursor = database.dict_cursor(db)
+
+    last_id = 0
+
+    while True:
+
+        cursor.execute(f"""
+        SELECT {columns}
         FROM reviews
-        WHERE user_id=%s AND DATE(created_at)=DATE(%s)
-        """,
-        (r["user_id"], r["created_at"])
-    )
-    daily_count = cursor.fetchone()["cnt"]
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+        """, (last_id, chunk_size))
+
+        chunk = cursor.fetchall()
+
+        if not chunk:
+            break
+
+        last_id = chunk[-1]["id"]
+
+        yield chunk
+
+    cursor.close()
+
+
+# path: a file, or the dataset name for fmt "store"
+
+def remove_output(path, fmt):
+
+    if fmt == "store":
+        shutil.rmtree(feature_store.dataset_path(path), ignore_errors=True)
+
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+class ChunkWriter:
+
+    def __init__(self, path, fmt):
+
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+
+        remove_output(path, fmt)
 
-    # -----------------------------
-    # WEAK SUPERVISION SCORE
-    # -----------------------------
+    def write(self, df):
 
-    score = 0
+        if self.fmt == "store":
 
-    if duplicate_flag:
-        score += 3
+            if self._writer is None:
+                self._writer = feature_store.create(self.path, list(df.columns))
 
-    if daily_count >= 3:
-        score += 2
+            self._writer.append(df)
 
-    if generic_flag:
-        score += 1
+        elif self.fmt == "parquet":
 
-    if word_count < 5:
-        score += 1
+            import pyarrow as pa
+            import pyarrow.parquet as pq
 
-    if user_review_count > 20:
-        score += 1
+            table = pa.Table.from_pandas(df, preserve_index=False)
 
-    if sentiment > 0.8 and r["rating"] == 5:
-        score += 1
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
 
-    scores.append(score)
+            self._writer.write_table(table)
 
-    rows.append({
-        "review_length": review_length,
-        "word_count": word_count,
-        "sentiment": sentiment,
-        "rating": r["rating"],
-        "duplicate_flag": duplicate_flag,
-        "generic_flag": generic_flag,
-        "user_review_count": user_review_count,
-        "daily_review_count": daily_count,
-        "score": score
-    })
+        else:
+
+            df.to_csv(self.path, mode="a", header=self.rows == 0, index=False)
+
+        self.rows += len(df)
+
+    def close(self):
+
+        if self.fmt == "parquet" and self._writer is not None:
+            self._writer.close()
+
+
+def iter_written_chunks(path, fmt, chunk_size):
+
+    if fmt == "store":
+
+        yield from feature_store.load(path).iter_frames(chunk_size)
+
+    elif fmt == "parquet":
+
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    else:
+
+        yield from pd.read_csv(path, chunksize=chunk_size, float_precision="round_trip")
+
+
+def build_streaming(db, chunk_size, fmt, workers, scored):
+
+    start = time.perf_counter()
+
+    # pass 1: make sure every review is in the duplicate index, so the
+    # lookups in pass 2 see the whole corpus
+    print("\nIndexing reviews for duplicate detection...")
+
+    index_cursor = db.cursor()
+    indexed = 0
+
+    for chunk in iter_review_chunks(db, "id, review_text", chunk_size):
+        indexed += index_reviews(index_cursor, review_texts(chunk))
+        db.commit()
+
+    print(f"Newly indexed reviews: {indexed}")
+
+    # pass 2: features + weak supervision score
+    writer = ChunkWriter(scored, fmt)
+
+    activity_cursor = db.cursor()
+
+    # DB reads stay in this process; feature extraction is fanned out
+    def tasks():
+
+        for chunk in iter_review_chunks(
+            db, "id, user_id, rating, review_text, created_at", chunk_size
+        ):
+
+            user_counts, daily_counts = fetch_user_activity(activity_cursor, chunk)
+
+            duplicate_flags = fetch_duplicate_flags(index_cursor, review_texts(chunk))
+
+            yield chunk_task(chunk, duplicate_flags, user_counts, daily_counts)
+
+    print("\nExtracting features from system reviews...\n")
+
+    for rows in ordered_map(extract_review_rows, tasks(), workers):
+
+        df = pd.DataFrame(rows, columns=COLUMNS)
+
+        writer.write(df)
+
+        elapsed = time.perf_counter() - start
+
+        print(f"{writer.rows} reviews | {writer.rows / elapsed:.0f} reviews/s")
+
+    writer.close()
+    activity_cursor.close()
+    index_cursor.close()
 
-df = pd.DataFrame(rows)
 
 # -----------------------------
-# LOAD KAGGLE LABELS
+# LABELS (--stage label)
+# the weak supervision score threshold is tuned against the kaggle
+# labels with running per-threshold confusion counts, then the
+# scored rows are labelled; both passes stream in chunks
 # -----------------------------
 
-kaggle_df = pd.read_csv("kaggle_features.csv")
+def label_dataset(scored, output, fmt, chunk_size):
+
+    start = time.perf_counter()
+
+    y_true = load_kaggle_labels()
+
+    tp = Counter()
+    fp = Counter()
+    fn = Counter()
+
+    offset = 0
+
+    for df in iter_written_chunks(scored, fmt, chunk_size):
+
+        overlap = max(0, min(len(df), len(y_true) - offset))
+
+        if overlap:
+
+            truth = y_true[offset:offset + overlap] == 1
+            scores = df["score"].values[:overlap]
+
+            for t in THRESHOLDS:
+                pred = scores >= t
+                tp[t] += int(np.sum(pred & truth))
+                fp[t] += int(np.sum(pred & ~truth))
+                fn[t] += int(np.sum(~pred & truth))
 
-y_true = kaggle_df["label"].apply(lambda x: 1 if x == 1 else 0).values
+        offset += len(df)
 
-print("\nWeak supervision threshold tuning\n")
+    print("\nWeak supervision threshold tuning\n")
 
-best_threshold = 3
-best_f1 = 0
+    best_threshold = 3
+    best_f1 = 0
 
-for t in range(1, 6):
+    for t in THRESHOLDS:
 
-    y_pred = [1 if s >= t else 0 for s in scores]
+        denominator = 2 * tp[t] + fp[t] + fn[t]
+        f1 = 2 * tp[t] / denominator if denominator else 0.0
 
-    min_len = min(len(y_true), len(y_pred))
+        print(f"Threshold {t} → F1 Score: {f1:.4f}")
 
-    f1 = f1_score(y_true[:min_len], y_pred[:min_len])
+        if f1 > best_f1:
+            best_f1 = f1
+            best_threshold = t
 
-    print(f"Threshold {t} → F1 Score: {f1:.4f}")
+    print("\nBest Weak Supervision Threshold:", best_threshold)
 
-    if f1 > best_f1:
-        best_f1 = f1
-        best_threshold = t
+    final = ChunkWriter(output, fmt)
+    label_counts = Counter()
+
+    if offset:
+
+        for df in iter_written_chunks(scored, fmt, chunk_size):
+
+            df["label"] = (df["score"] >= best_threshold).astype(int)
+            df = df.drop(columns=["score"])
+
+            label_counts.update(df["label"].tolist())
+
+            final.write(df)
+
+    final.close()
+
+    elapsed = time.perf_counter() - start
+
+    print("\nSystem dataset size:", final.rows)
+    for label, count in sorted(label_counts.items()):
+        print(f"label {label}: {count}")
+
+    print(f"\nLabelled in {elapsed:.1f}s")
+    print(f"\nDataset created successfully → {output}")
 
-print("\nBest Weak Supervision Threshold:", best_threshold)
 
 # -----------------------------
-# FINAL DATASET
+# MAIN
 # -----------------------------
 
-df["label"] = df["score"].apply(lambda x: 1 if x >= best_threshold else 0)
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Build the system review dataset")
+    parser.add_argument("--stream", action="store_true",
+                        help="page through reviews in chunks with bounded memory")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--format", choices=["store", "csv", "parquet"], default="store",
+                        help="feature store dataset (default) or a file")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used for feature extraction")
+    parser.add_argument("--stage", choices=["all", "features", "label"], default="all",
+                        help="features: scored rows only (no kaggle data needed); "
+                             "label: tune + label previously scored rows")
+    args = parser.parse_args()
+
+    output = OUTPUTS[args.format]
+    scored = SCORED[args.format]
+
+    if args.stage in ("all", "features"):
+
+        with database.connection() as db:
+
+            check_activity_counters(db)
 
-df.drop(columns=["score"], inplace=True)
+            if args.stream:
+                build_streaming(db, args.chunk_size, args.format, args.workers, scored)
+            else:
+                build_in_memory(db, args.chunk_size, args.format, args.workers, scored)
 
-df.to_csv("review_dataset.csv", index=False)
+    if args.stage in ("all", "label"):
 
-print("\nSystem dataset size:", len(df))
-print(df["label"].value_counts())
+        label_dataset(scored, output, args.format, args.chunk_size)
 
-print("\nDataset created successfully → review_dataset.csv")
\ No newline at end of file
+    # with a single run the scored rows are only an intermediate
+    if args.stage == "all":
+        remove_output(scored, args.format)
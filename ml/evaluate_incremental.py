@@ -0,0 +1,158 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import feature_store
+from features import FEATURE_COLUMNS
+from incremental_model import initial_fit, update, predict_proba
+
+# -----------------------------
+# INCREMENTAL vs FULL RETRAIN
+# replays the final dataset as a stream: the model starts on the
+# first --initial share of the training rows and the rest arrive in
+# --batches equal batches. After each batch the online model does one
+# partial_fit on that batch only, and the baselines are refitted from
+# scratch on everything seen so far:
+#
+#   lr  the logistic pipeline of train_logistic_model.py
+#   rf  a random forest with the served model's parameters
+#
+# all three use features.FEATURE_COLUMNS and a 0.5 threshold, and are
+# scored on the same held-out 20%.
+#
+#   python evaluate_incremental.py --batches 10
+# -----------------------------
+
+SERVED_MODEL = "../model/review_model.pkl"
+
+
+def full_lr():
+
+    return Pipeline([
+        ("imputer", SimpleImputer(strategy="median")),
+        ("model", LogisticRegression(max_iter=3000, solver="lbfgs", class_weight="balanced"))
+    ])
+
+
+def full_rf():
+
+    params = {"n_estimators": 100, "max_depth": 12}
+
+    try:
+        served = joblib.load(SERVED_MODEL)["model"].get_params()
+        params = {k: served[k] for k in ("n_estimators", "max_depth", "min_samples_split", "min_samples_leaf")}
+    except (OSError, KeyError):
+        pass
+
+    return RandomForestClassifier(class_weight="balanced", random_state=42, n_jobs=-1, **params)
+
+
+def scores(y_true, proba):
+
+    pred = (proba >= 0.5).astype(int)
+
+    return accuracy_score(y_true, pred), f1_score(y_true, pred, zero_division=0)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compare incremental updates with full retrains")
+    parser.add_argument("--initial", type=float, default=0.5, help="share of training rows fitted first")
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--no-forest", action="store_true", help="skip the random forest baseline")
+    args = parser.parse_args()
+
+    df = feature_store.load(feature_store.FINAL).training_frame()
+
+    X = df[FEATURE_COLUMNS].values.astype(np.float64)
+    y = df["label"].astype(int).values
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # arrival order
+    order = np.random.default_rng(42).permutation(len(y_train))
+    X_train, y_train = X_train[order], y_train[order]
+
+    initial = int(len(y_train) * args.initial)
+    bounds = np.linspace(initial, len(y_train), args.batches + 1).astype(int)
+
+    baselines = {"lr": full_lr}
+
+    if not args.no_forest:
+        baselines["rf"] = full_rf
+
+    start = time.perf_counter()
+    bundle = initial_fit(X_train[:initial], y_train[:initial])
+    init_time = time.perf_counter() - start
+
+    print(f"{len(y_train)} training rows: {initial} initial + {args.batches} batches, "
+          f"{len(y_test)} test rows (initial fit {init_time * 1000:.1f} ms)\n")
+
+    header = f"{'batch':>5} {'rows':>6} | {'online ms':>9} {'acc':>6} {'f1':>6}"
+
+    for name in baselines:
+        header += f" | {name + ' ms':>9} {'acc':>6} {'f1':>6}"
+
+    print(header)
+
+    totals = {name: [] for name in ["online"] + list(baselines)}
+    final = {}
+
+    for i in range(args.batches):
+
+        lo, hi = bounds[i], bounds[i + 1]
+
+        start = time.perf_counter()
+        update(bundle, X_train[lo:hi], y_train[lo:hi])
+        elapsed = time.perf_counter() - start
+
+        totals["online"].append(elapsed)
+        final["online"] = scores(y_test, predict_proba(bundle, X_test))
+
+        line = f"{i + 1:>5} {hi:>6} | {elapsed * 1000:>9.1f} {final['online'][0]:>6.3f} {final['online'][1]:>6.3f}"
+
+        for name, make in baselines.items():
+
+            model = make()
+
+            start = time.perf_counter()
+            model.fit(X_train[:hi], y_train[:hi])
+            elapsed = time.perf_counter() - start
+
+            totals[name].append(elapsed)
+            final[name] = scores(y_test, model.predict_proba(X_test)[:, 1])
+
+            line += f" | {elapsed * 1000:>9.1f} {final[name][0]:>6.3f} {final[name][1]:>6.3f}"
+
+        print(line)
+
+    print("\nafter the last batch:")
+
+    online_ms = np.mean(totals["online"]) * 1000
+
+    for name, (acc, f1) in final.items():
+
+        mean_ms = np.mean(totals[name]) * 1000
+
+        line = f"  {name:<7} acc {acc:.3f}  f1 {f1:.3f}  mean update {mean_ms:8.1f} ms"
+
+        if name != "online":
+            line += (f"  (online: {acc - final['online'][0]:+.3f} acc, "
+                     f"{f1 - final['online'][1]:+.3f} f1 behind, "
+                     f"{mean_ms / max(online_ms, 1e-9):.0f}x slower to update)")
+
+        print(line)
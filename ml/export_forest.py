@@ -0,0 +1,118 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import feature_store
+from forest import CompactForest, export_forest, forest_dir
+from scoring import model_file_version
+
+# -----------------------------
+# EXPORT review_model.pkl TO THE COMPACT FOREST FORMAT
+# writes ../model/review_model.forest/ and checks that its
+# predictions are identical to the sklearn model's:
+#
+#   python export_forest.py
+# -----------------------------
+
+MODEL_PATH = "../model/review_model.pkl"
+
+RANDOM_ROWS = 20000
+
+
+def export(model_path):
+
+    bundle = joblib.load(model_path)
+
+    path = forest_dir(model_path)
+
+    meta = export_forest(
+        bundle["model"],
+        path,
+        bundle["threshold"],
+        bundle["features"],
+        model_file_version(model_path)
+    )
+
+    return bundle, path, meta
+
+
+def check_rows(bundle):
+
+    features = bundle["features"]
+
+    parts = []
+
+    try:
+        dataset = feature_store.load(feature_store.FINAL)
+        parts.append(dataset.frame(features).values.astype(np.float64))
+    except FileNotFoundError:
+        pass
+
+    # plus random rows spread over the range of every split feature
+    rng = np.random.default_rng(0)
+
+    parts.append(np.column_stack([
+        rng.integers(0, 2000, RANDOM_ROWS),     # review_length
+        rng.integers(0, 400, RANDOM_ROWS),      # word_count
+        rng.uniform(-1, 1, RANDOM_ROWS),        # sentiment
+        rng.integers(0, 6, RANDOM_ROWS),        # rating
+        rng.integers(0, 40, RANDOM_ROWS),       # user_review_count
+        rng.integers(0, 10, RANDOM_ROWS),       # daily_review_count
+        rng.integers(0, 2, RANDOM_ROWS),        # duplicate_flag
+        rng.integers(0, 2, RANDOM_ROWS)         # generic_flag
+    ]).astype(np.float64))
+
+    return np.vstack(parts)
+
+
+def verify(bundle, path):
+
+    X = check_rows(bundle)
+
+    expected = bundle["model"].predict_proba(X)
+    actual = CompactForest(path).predict_proba(X)
+
+    if not np.array_equal(expected, actual):
+        diff = np.abs(expected - actual).max()
+        sys.exit(f"❌ exported forest differs from the sklearn model (max diff {diff})")
+
+    print(f"✅ identical predictions on {len(X)} rows")
+
+
+def report(model_path, path):
+
+    start = time.perf_counter()
+    joblib.load(model_path)
+    pickle_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    CompactForest(path)
+    compact_time = time.perf_counter() - start
+
+    compact_size = sum(
+        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+    )
+
+    print(f"pickle : {os.path.getsize(model_path) / 1e6:.2f} MB, load {pickle_time * 1000:.1f} ms")
+    print(f"compact: {compact_size / 1e6:.2f} MB, load {compact_time * 1000:.1f} ms (mmap)")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Export the review model to flat node arrays")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    bundle, path, meta = export(args.model)
+
+    print(f"Exported {meta['n_trees']} trees / {meta['n_nodes']} nodes → {path}")
+
+    verify(bundle, path)
+
+    report(args.model, path)
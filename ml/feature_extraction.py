@@ -0,0 +1,180 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from features import activity_for
+from sentiment import polarities
+
+# -----------------------------
+# SHARED FEATURE EXTRACTION
+# used by dataset_builder.py and kaggle_processor.py. Work is split
+# into fixed-size chunks that are fanned out to a process pool and
+# gathered back in order; chunk boundaries never depend on the
+# number of workers, so output is identical for any --workers N.
+# -----------------------------
+
+CHUNK_SIZE = 5000
+
+SEED = 42
+
+GENERIC_PHRASES = ["good", "nice", "excellent", "very good"]
+
+
+def chunked(items, size=CHUNK_SIZE):
+
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ordered map over an iterable of argument tuples; with workers <= 1
+# everything runs in-process. At most max_pending chunks are in flight
+# so streaming producers keep bounded memory.
+
+def ordered_map(func, arg_tuples, workers=1, max_pending=None):
+
+    if workers <= 1:
+        for args in arg_tuples:
+            yield func(*args)
+        return
+
+    max_pending = max_pending or workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        pending = deque()
+
+        for args in arg_tuples:
+
+            pending.append(pool.submit(func, *args))
+
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+# -----------------------------
+# SYSTEM REVIEWS (dataset_builder.py)
+# -----------------------------
+
+def weak_supervision_score(duplicate_flag, daily_count, generic_flag, word_count,
+                           user_review_count, sentiment, rating):
+
+    score = 0
+
+    if duplicate_flag:
+        score += 3
+
+    if daily_count >= 3:
+        score += 2
+
+    if generic_flag:
+        score += 1
+
+    if word_count < 5:
+        score += 1
+
+    if user_review_count > 20:
+        score += 1
+
+    if sentiment > 0.8 and rating == 5:
+        score += 1
+
+    return score
+
+
+# duplicate_flags: {review_id: flag} from duplicates.fetch_duplicate_flags
+# (corpus-wide exact / near duplicates, same lookup as scoring.py)
+
+def extract_review_rows(reviews, duplicate_flags, user_counts, daily_counts):
+
+    rows = []
+
+    sentiments = polarities([r["review_text"] for r in reviews])
+
+    for r, sentiment in zip(reviews, sentiments):
+
+        text = r["review_text"]
+        normalized = text.lower().strip()
+
+        word_count = len(text.split())
+        review_length = len(text)
+
+        duplicate_flag = 1 if duplicate_flags.get(r["id"]) else 0
+
+        generic_flag = 1 if normalized in GENERIC_PHRASES else 0
+
+        # Total reviews by user / reviews by same user on same day
+        user_review_count, daily_count = activity_for(
+            user_counts, daily_counts, r["user_id"], r["created_at"]
+        )
+
+        score = weak_supervision_score(
+            duplicate_flag, daily_count, generic_flag, word_count,
+            user_review_count, sentiment, r["rating"]
+        )
+
+        rows.append({
+            "review_length": review_length,
+            "word_count": word_count,
+            "sentiment": sentiment,
+            "rating": r["rating"],
+            "duplicate_flag": duplicate_flag,
+            "generic_flag": generic_flag,
+            "user_review_count": user_review_count,
+            "daily_review_count": daily_count,
+            "score": score
+        })
+
+    return rows
+
+
+# -----------------------------
+# KAGGLE REVIEWS (kaggle_processor.py)
+# -----------------------------
+
+KAGGLE_COLUMNS = [
+    "review_length",
+    "word_count",
+    "sentiment",
+    "user_review_count",
+    "daily_review_count",
+    "label"
+]
+
+
+# texts/raw_labels: one chunk; chunk_index seeds this chunk's own
+# generator for the synthetic reviewer-activity columns
+
+def extract_kaggle_rows(texts, raw_labels, chunk_index, seed=SEED):
+
+    rng = np.random.default_rng([seed, chunk_index])
+
+    user_review_counts = rng.integers(1, 21, size=len(texts))
+    daily_review_counts = rng.integers(1, 6, size=len(texts))
+
+    sentiments = polarities(texts)
+
+    rows = []
+
+    for i, (text, raw_label, polarity) in enumerate(zip(texts, raw_labels, sentiments)):
+
+        # FORCE BINARY LABEL
+        label = 1 if int(raw_label) != 0 else 0   # fake = 1, genuine = 0
+
+        rows.append([
+            len(text),
+            len(text.split()),
+            polarity,
+            int(user_review_counts[i]),
+            int(daily_review_counts[i]),
+            label
+        ])
+
+    return rows
@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from features import FEATURE_COLUMNS
+
+# -----------------------------
+# COLUMNAR FEATURE STORE
+# datasets passed between the ml scripts, one directory each:
+#
+#   ml/store/<dataset>/
+#       schema.json     columns, dtypes, committed row count
+#       <column>.bin    raw little-endian values, one file per column
+#
+# columns are read as read-only np.memmap (zero copy, only the
+# selected columns are touched). Appends write every column first
+# and then commit the new row count with an atomic schema rewrite,
+# so a crashed append is invisible and overwritten by the next one.
+# Dtypes come from SCHEMA: a dataset cannot hold an unknown column,
+# and training reads refuse data without FEATURE_COLUMNS.
+# -----------------------------
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "store")
+
+SCHEMA_FILE = "schema.json"
+
+SCHEMA = {
+    "review_length": "<i4",
+    "word_count": "<i4",
+    "sentiment": "<f8",
+    "rating": "<i1",
+    "user_review_count": "<i4",
+    "daily_review_count": "<i4",
+    "duplicate_flag": "<i1",
+    "generic_flag": "<i1",
+    "burst_flag": "<i1",
+    "score": "<i2",
+    "label": "<i1"
+}
+
+# dataset names used by the pipeline, and the CSVs they replace
+SYSTEM = "system"
+KAGGLE = "kaggle"
+FINAL = "final"
+
+LEGACY_CSV = {
+    SYSTEM: "review_dataset.csv",
+    KAGGLE: "kaggle_features.csv",
+    FINAL: "final_review_dataset.csv"
+}
+
+TRAINING_COLUMNS = FEATURE_COLUMNS + ["label"]
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _coerce(name, values, dtype):
+
+    values = np.asarray(values)
+    converted = values.astype(dtype)
+
+    # no silent truncation (2.5 -> 2, 300 -> 44)
+    if values.dtype.kind in "fiub" and not np.array_equal(converted, values):
+        raise SchemaError(f"column {name}: values do not fit {np.dtype(dtype)}")
+
+    return converted
+
+
+class Dataset:
+
+    def __init__(self, path):
+
+        self.path = path
+        self.name = os.path.basename(path)
+
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+
+        self.columns = schema["columns"]
+        self.dtypes = {c: np.dtype(schema["dtypes"][c]) for c in self.columns}
+        self.rows = schema["rows"]
+
+    def __len__(self):
+
+        return self.rows
+
+    def _file(self, column):
+
+        return os.path.join(self.path, column + ".bin")
+
+    def _commit(self, columns, rows):
+
+        schema = {
+            "columns": columns,
+            "dtypes": {c: SCHEMA[c] for c in columns},
+            "rows": rows
+        }
+
+        tmp = os.path.join(self.path, SCHEMA_FILE + ".tmp")
+
+        with open(tmp, "w") as f:
+            json.dump(schema, f, indent=2)
+
+        os.replace(tmp, os.path.join(self.path, SCHEMA_FILE))
+
+        self.columns = columns
+        self.dtypes = {c: np.dtype(SCHEMA[c]) for c in columns}
+        self.rows = rows
+
+    # frame: DataFrame (or dict of arrays) with exactly this dataset's columns
+    def append(self, frame):
+
+        names = list(frame.keys())
+
+        if sorted(names) != sorted(self.columns):
+            raise SchemaError(
+                f"{self.name}: expected columns {self.columns}, got {names}"
+            )
+
+        arrays = {c: _coerce(c, frame[c], self.dtypes[c]) for c in self.columns}
+
+        lengths = {len(a) for a in arrays.values()}
+
+        if len(lengths) != 1:
+            raise SchemaError(f"{self.name}: columns have different lengths")
+
+        added = lengths.pop()
+
+        if not added:
+            return
+
+        for column, array in arrays.items():
+
+            with open(self._file(column), "r+b" if os.path.exists(self._file(column)) else "wb") as f:
+                # drop whatever an interrupted append left behind
+                f.truncate(self.rows * array.itemsize)
+                f.seek(self.rows * array.itemsize)
+                f.write(array.tobytes())
+
+        self._commit(self.columns, self.rows + added)
+
+    # derived column over the existing rows (e.g. fix_dataset's burst_flag)
+    def add_column(self, column, values):
+
+        if column not in SCHEMA:
+            raise SchemaError(f"{column}: not in the feature store schema")
+
+        array = _coerce(column, values, SCHEMA[column])
+
+        if len(array) != self.rows:
+            raise SchemaError(f"{column}: {len(array)} values for {self.rows} rows")
+
+        with open(self._file(column), "wb") as f:
+            f.write(array.tobytes())
+
+        columns = self.columns if column in self.columns else self.columns + [column]
+
+        self._commit(columns, self.rows)
+
+    def column(self, name):
+
+        if name not in self.dtypes:
+            raise SchemaError(f"{self.name}: no column {name}")
+
+        if not self.rows:
+            return np.empty(0, dtype=self.dtypes[name])
+
+        return np.memmap(self._file(name), dtype=self.dtypes[name], mode="r", shape=(self.rows,))
+
+    # zero-copy: {column: read-only memmap}
+    def select(self, columns=None):
+
+        return {c: self.column(c) for c in (columns or self.columns)}
+
+    def frame(self, columns=None):
+
+        return pd.DataFrame(self.select(columns), columns=columns or self.columns)
+
+    def iter_frames(self, chunk_size, columns=None):
+
+        arrays = self.select(columns)
+
+        for start in range(0, self.rows, chunk_size):
+            yield pd.DataFrame(
+                {c: a[start:start + chunk_size] for c, a in arrays.items()},
+                columns=columns or self.columns
+            )
+
+    # what the trainers read: the model's features in scoring order + label
+    def training_frame(self):
+
+        missing = [c for c in TRAINING_COLUMNS if c not in self.dtypes]
+
+        if missing:
+            raise SchemaError(f"{self.name}: missing model columns {missing}")
+
+        return self.frame(TRAINING_COLUMNS)
+
+
+def dataset_path(name, root=STORE_DIR):
+
+    return os.path.join(root, name)
+
+
+def exists(name, root=STORE_DIR):
+
+    return os.path.exists(os.path.join(dataset_path(name, root), SCHEMA_FILE))
+
+
+def create(name, columns, root=STORE_DIR):
+
+    unknown = [c for c in columns if c not in SCHEMA]
+
+    if unknown:
+        raise SchemaError(f"{name}: columns not in the feature store schema: {unknown}")
+
+    path = dataset_path(name, root)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    with open(os.path.join(path, SCHEMA_FILE), "w") as f:
+        json.dump({"columns": list(columns), "dtypes": {c: SCHEMA[c] for c in columns}, "rows": 0}, f)
+
+    return Dataset(path)
+
+
+def import_csv(name, csv_path, root=STORE_DIR, chunk_size=50000):
+
+    dataset = None
+
+    for df in pd.read_csv(csv_path, chunksize=chunk_size, float_precision="round_trip"):
+
+        if dataset is None:
+            dataset = create(name, list(df.columns), root)
+
+        dataset.append(df)
+
+    return dataset
+
+
+# opens a dataset; the first time, an existing CSV from the old
+# pipeline is imported instead of failing
+def load(name, root=STORE_DIR):
+
+    if not exists(name, root):
+
+        legacy = os.path.join(os.path.dirname(os.path.abspath(__file__)), LEGACY_CSV.get(name, ""))
+
+        if name in LEGACY_CSV and os.path.exists(legacy):
+            print(f"Importing {LEGACY_CSV[name]} into the feature store ({name})")
+            return import_csv(name, legacy, root)
+
+        raise FileNotFoundError(f"feature store has no dataset '{name}'")
+
+    return Dataset(dataset_path(name, root))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Inspect / convert feature store datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    show = commands.add_parser("show", help="schema and row count")
+    show.add_argument("name")
+
+    imp = commands.add_parser("import", help="load a CSV into a dataset")
+    imp.add_argument("name")
+    imp.add_argument("csv_path")
+
+    exp = commands.add_parser("export", help="write a dataset as CSV")
+    exp.add_argument("name")
+    exp.add_argument("csv_path")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        dataset = import_csv(args.name, args.csv_path)
+        print(f"{args.name}: {len(dataset)} rows")
+
+    elif args.command == "export":
+        load(args.name).frame().to_csv(args.csv_path, index=False)
+
+    else:
+        dataset = load(args.name)
+        print(f"{dataset.name}: {len(dataset)} rows")
+        for column in dataset.columns:
+            print(f"  {column:<20} {dataset.dtypes[column]}")
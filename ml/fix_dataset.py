@@ -1,24 +1,14 @@
-import pandas as pd
+import feature_store
 
-df = pd.read_csv("final_review_dataset.csv")
+# merge_datasets.py adds burst_flag itself now; this only upgrades a
+# final dataset merged before it did, in place
+
+dataset = feature_store.load(feature_store.FINAL)
 
 # burst_flag = 1 if many reviews per day, else 0
-df["burst_flag"] = (df["daily_review_count"] >= 3).astype(int)
+# (added next to the model columns, which must stay as they are)
+burst_flag = (dataset.column("daily_review_count") >= 3).astype(int)
 
-# Reorder columns (IMPORTANT)
-df = df[
-    [
-        "review_length",
-        "word_count",
-        "sentiment",
-        "rating",
-        "user_review_count",
-        "daily_review_count",
-        "duplicate_flag",
-        "burst_flag",
-        "label"
-    ]
-]
+dataset.add_column("burst_flag", burst_flag)
 
-df.to_csv("final_review_dataset.csv", index=False)
 print("✅ Dataset fixed: burst_flag added")
@@ -0,0 +1,203 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils.class_weight import compute_class_weight
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import feature_store
+from features import FEATURE_COLUMNS
+
+# -----------------------------
+# INCREMENTAL (ONLINE) MODEL
+# a logistic model trained with SGD that is updated from new
+# labelled batches with partial_fit, without touching the rows it
+# has already seen:
+#
+#   python incremental_model.py init              fit on the final dataset
+#   python incremental_model.py update system     learn the rows of 'system'
+#                                                 appended since the last update
+#   python incremental_model.py show
+#
+# the scaler and the class weights are fixed at init: rescaling
+# later would silently change what the learned coefficients mean.
+# The model remembers how many rows of each feature store dataset
+# it has learned, so an update only reads the new tail.
+# evaluate_incremental.py compares it against full retrains.
+# -----------------------------
+
+MODEL_PATH = "../model/review_model_online.pkl"
+
+CLASSES = np.array([0, 1])
+
+# passes over the initial data; updates are a single pass
+INIT_EPOCHS = 5
+
+
+def new_classifier(class_weight):
+
+    return SGDClassifier(
+        loss="log_loss",
+        alpha=1e-4,
+        learning_rate="optimal",
+        # averaged SGD: plain SGD drifts (0.77 -> 0.56 accuracy over
+        # five batches in evaluate_incremental.py), the average does not
+        average=True,
+        class_weight=class_weight,
+        random_state=42
+    )
+
+
+def initial_fit(X, y, epochs=INIT_EPOCHS):
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y).astype(int)
+
+    scaler = StandardScaler().fit(X)
+
+    # "balanced" is not allowed with partial_fit: freeze it as a dict
+    weights = compute_class_weight("balanced", classes=CLASSES, y=y)
+    class_weight = {int(c): float(w) for c, w in zip(CLASSES, weights)}
+
+    model = new_classifier(class_weight)
+
+    Xs = scaler.transform(X)
+    rng = np.random.default_rng(42)
+
+    for _ in range(epochs):
+        order = rng.permutation(len(y))
+        model.partial_fit(Xs[order], y[order], classes=CLASSES)
+
+    return {
+        "model": model,
+        "scaler": scaler,
+        "features": FEATURE_COLUMNS,
+        "threshold": 0.5,
+        "rows_seen": int(len(y)),
+        "updates": 0,
+        "offsets": {}
+    }
+
+
+def update(bundle, X, y):
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y).astype(int)
+
+    if not len(y):
+        return bundle
+
+    bundle["model"].partial_fit(bundle["scaler"].transform(X), y, classes=CLASSES)
+
+    bundle["rows_seen"] += int(len(y))
+    bundle["updates"] += 1
+
+    return bundle
+
+
+def predict_proba(bundle, X):
+
+    X = np.asarray(X, dtype=np.float64)
+
+    return bundle["model"].predict_proba(bundle["scaler"].transform(X))[:, 1]
+
+
+def save(bundle, path=MODEL_PATH):
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp = path + ".tmp"
+    joblib.dump(bundle, tmp)
+    os.replace(tmp, path)
+
+
+# rows [start, len) of a feature store dataset, in model column order
+def dataset_batch(name, start):
+
+    dataset = feature_store.load(name)
+
+    columns = dataset.select(FEATURE_COLUMNS + ["label"])
+
+    X = np.column_stack([columns[c][start:] for c in FEATURE_COLUMNS]).astype(np.float64)
+    y = np.asarray(columns["label"][start:]).astype(int)
+
+    return X, y, len(dataset)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Incrementally trained review model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="fit from scratch on a dataset")
+    init.add_argument("dataset", nargs="?", default=feature_store.FINAL)
+
+    upd = commands.add_parser("update", help="learn the new rows of a dataset")
+    upd.add_argument("dataset")
+    upd.add_argument("--from-row", type=int, default=None,
+                     help="start here instead of after the last update")
+
+    commands.add_parser("show", help="what the model has learned so far")
+
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "init":
+
+        X, y, rows = dataset_batch(args.dataset, 0)
+
+        start = time.perf_counter()
+        bundle = initial_fit(X, y)
+        elapsed = time.perf_counter() - start
+
+        bundle["offsets"][args.dataset] = rows
+
+        save(bundle, args.model)
+
+        print(f"Fitted on {rows} rows of '{args.dataset}' in {elapsed * 1000:.1f} ms → {args.model}")
+
+    elif args.command == "update":
+
+        bundle = joblib.load(args.model)
+
+        offset = bundle["offsets"].get(args.dataset, 0)
+        start_row = offset if args.from_row is None else args.from_row
+
+        rows = len(feature_store.load(args.dataset))
+
+        # rebuilt (not appended to) since the last update
+        if rows < start_row:
+            sys.exit(
+                f"'{args.dataset}' has {rows} rows but {start_row} were already learned; "
+                f"it was rebuilt — pass --from-row to choose where to continue"
+            )
+
+        X, y, rows = dataset_batch(args.dataset, start_row)
+
+        start = time.perf_counter()
+        update(bundle, X, y)
+        elapsed = time.perf_counter() - start
+
+        bundle["offsets"][args.dataset] = rows
+
+        save(bundle, args.model)
+
+        print(f"Learned {len(y)} new rows of '{args.dataset}' in {elapsed * 1000:.1f} ms "
+              f"({bundle['rows_seen']} rows, {bundle['updates']} updates so far)")
+
+    else:
+
+        bundle = joblib.load(args.model)
+
+        print(f"rows seen : {bundle['rows_seen']}")
+        print(f"updates   : {bundle['updates']}")
+        print(f"weights   : {bundle['model'].class_weight}")
+
+        for name, rows in bundle["offsets"].items():
+            print(f"  {name:<16} learned up to row {rows}")
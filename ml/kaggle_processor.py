@@ -1,45 +1,52 @@
+import argparse
+import os
+import sys
 import pandas as pd
-import random
-from textblob import TextBlob
-
-df = pd.read_csv("ml/kaggle_data/fake_reviews_dataset.csv")
-
-features = []
-
-for _, row in df.iterrows():
-    text = str(row[0])
-
-    # FORCE BINARY LABEL
-    raw_label = int(row[1])
-    label = 1 if raw_label != 0 else 0   # fake = 1, genuine = 0
-
-    polarity = TextBlob(text).sentiment.polarity
-    word_count = len(text.split())
-    review_length = len(text)
-
-    user_review_count = random.randint(1, 20)
-    daily_review_count = random.randint(1, 5)
-
-    features.append([
-        review_length,
-        word_count,
-        polarity,
-        user_review_count,
-        daily_review_count,
-        label
-    ])
-
-final_df = pd.DataFrame(
-    features,
-    columns=[
-        "review_length",
-        "word_count",
-        "sentiment",
-        "user_review_count",
-        "daily_review_count",
-        "label"
-    ]
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import feature_store
+from feature_extraction import (
+    extract_kaggle_rows,
+    chunked,
+    ordered_map,
+    KAGGLE_COLUMNS,
+    CHUNK_SIZE,
+    SEED
 )
 
-final_df.to_csv("ml/kaggle_features.csv", index=False)
-print("✅ Kaggle dataset converted to BINARY labels")
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Convert the Kaggle reviews to model features")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used for feature extraction")
+    parser.add_argument("--seed", type=int, default=SEED,
+                        help="seed for the synthetic reviewer-activity columns")
+    args = parser.parse_args()
+
+    df = pd.read_csv("ml/kaggle_data/fake_reviews_dataset.csv")
+
+    texts = df.iloc[:, 0].astype(str).tolist()
+    raw_labels = df.iloc[:, 1].tolist()
+
+    # fixed-size chunks, each with its own seeded generator: the output
+    # does not depend on --workers
+    tasks = (
+        (text_chunk, label_chunk, i, args.seed)
+        for i, (text_chunk, label_chunk) in enumerate(
+            zip(chunked(texts, CHUNK_SIZE), chunked(raw_labels, CHUNK_SIZE))
+        )
+    )
+
+    dataset = feature_store.create(feature_store.KAGGLE, KAGGLE_COLUMNS)
+
+    # appended chunk by chunk as results come back
+    for rows in ordered_map(extract_kaggle_rows, tasks, args.workers):
+        dataset.append(pd.DataFrame(rows, columns=KAGGLE_COLUMNS))
+
+    print(f"✅ Kaggle dataset converted to BINARY labels ({len(dataset)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import pandas as pd
 
+import feature_store
+
 # -----------------------------
 
 # LOAD DATASETS
 
 # -----------------------------
 
-system_df = pd.read_csv("review_dataset.csv")
-kaggle_df = pd.read_csv("kaggle_features.csv")
+system_df = feature_store.load(feature_store.SYSTEM).frame()
+kaggle_df = feature_store.load(feature_store.KAGGLE).frame()
 
 print("System dataset:", len(system_df))
 print("Kaggle dataset:", len(kaggle_df))
@@ -71,10 +73,21 @@ print(balanced_df["label"].value_counts())
 
 # -----------------------------
 
+# DERIVED COLUMNS
+
+# -----------------------------
+
+# burst_flag = 1 if many reviews per day, else 0
+# (added after the model columns, which must stay as they are)
+
+balanced_df["burst_flag"] = (balanced_df["daily_review_count"] >= 3).astype(int)
+
+# -----------------------------
+
 # SAVE FINAL DATASET
 
 # -----------------------------
 
-balanced_df.to_csv("final_review_dataset.csv", index=False)
+feature_store.create(feature_store.FINAL, list(balanced_df.columns)).append(balanced_df)
 
 print("\n✅ Balanced dataset saved successfully")
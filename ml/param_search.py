@@ -0,0 +1,235 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+# -----------------------------
+# RESUMABLE SUCCESSIVE HALVING
+# used by train_final_model.py, with the number of trees as the
+# resource: every other setting starts with the smallest
+# n_estimators of the grid, and only the best 1/FACTOR grow to the
+# next size. Forests are grown with warm_start, which gives exactly
+# the trees a fresh fit of that size would, so each evaluated
+# (params, n_estimators) is the grid's own candidate.
+# Out-of-fold probabilities of every fold fit are stored on disk,
+# keyed by a hash of the training data, so an interrupted or
+# repeated run only fits what is missing.
+# -----------------------------
+
+CACHE_DIR = "search_cache"
+
+FACTOR = 3
+FOLDS = 3
+SEED = 42
+
+RESOURCE = "n_estimators"
+
+
+def dataset_hash(X, y):
+
+    h = hashlib.sha1()
+
+    h.update(",".join(X.columns).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+
+    return h.hexdigest()[:16]
+
+
+def param_grid_candidates(param_grid):
+
+    names = sorted(param_grid)
+
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(param_grid[n] for n in names))
+    ]
+
+
+def params_key(params):
+
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class FoldCache:
+
+    def __init__(self, root, data_key):
+
+        self.path = os.path.join(root, data_key)
+        os.makedirs(self.path, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, params, fold):
+
+        return os.path.join(self.path, f"{params_key(params)}_{fold}.npz")
+
+    def get(self, params, fold):
+
+        try:
+            with np.load(self._file(params, fold)) as data:
+                entry = data["proba"], float(data["fit_time"])
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return entry
+
+    def put(self, params, fold, proba, fit_time):
+
+        path = self._file(params, fold)
+
+        # written under a temp name: a killed run never leaves a
+        # truncated entry behind
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, proba=proba, fit_time=fit_time)
+        os.replace(tmp, path)
+
+
+class HalvingSearch:
+
+    def __init__(self, estimator, param_grid, scorer, cache_dir=CACHE_DIR,
+                 factor=FACTOR, folds=FOLDS, seed=SEED):
+
+        self.estimator = estimator
+        self.scorer = scorer
+        self.cache_dir = cache_dir
+        self.factor = factor
+        self.folds = folds
+        self.seed = seed
+
+        self.sizes = sorted(param_grid[RESOURCE])
+        self.candidates = param_grid_candidates(
+            {k: v for k, v in param_grid.items() if k != RESOURCE}
+        )
+
+        self.cache = None
+        self.fit_seconds = 0.0
+
+    def use_data(self, X, y):
+
+        self.cache = FoldCache(self.cache_dir, dataset_hash(X, y))
+
+    def _splits(self, X, y):
+
+        return list(StratifiedKFold(self.folds, shuffle=True, random_state=self.seed).split(X, y))
+
+    # out-of-fold probabilities of params with n trees. forests holds
+    # this setting's fold forests between calls (grown with warm_start
+    # instead of refitted); pass None to always start from scratch
+    def oof_proba(self, params, n, X, y, forests=None):
+
+        y = np.asarray(y)
+
+        full = dict(params, **{RESOURCE: n})
+
+        oof = np.zeros(len(y), dtype=np.float64)
+        fit_time = 0.0
+
+        for fold, (train_idx, valid_idx) in enumerate(self._splits(X, y)):
+
+            cached = self.cache.get(full, fold)
+
+            model = forests.get(fold) if forests is not None else None
+
+            if cached is None:
+
+                if model is None or model.get_params()[RESOURCE] > n:
+                    model = clone(self.estimator).set_params(warm_start=True, **full)
+                else:
+                    model.set_params(**{RESOURCE: n})
+
+                start = time.perf_counter()
+                model.fit(X.iloc[train_idx], y[train_idx])
+
+                cached = (
+                    model.predict_proba(X.iloc[valid_idx])[:, 1],
+                    time.perf_counter() - start
+                )
+
+                self.cache.put(full, fold, *cached)
+                self.fit_seconds += cached[1]
+
+                if forests is not None:
+                    forests[fold] = model
+
+            elif forests is not None and model is not None and model.get_params()[RESOURCE] < n:
+                # the cached result skipped this size: the kept forest
+                # can no longer be grown to match it
+                forests.pop(fold)
+
+            oof[valid_idx] = cached[0]
+            fit_time += cached[1]
+
+        return oof, fit_time
+
+    def fit(self, X, y):
+
+        self.use_data(X, y)
+
+        y = np.asarray(y)
+
+        survivors = self.candidates
+        forests = {params_key(p): {} for p in survivors}
+
+        # seconds per tree (all folds) of every setting, measured on the
+        # first round's from-scratch fits; used for the grid estimate
+        self.tree_cost = {}
+
+        best = None
+
+        for round_index, n in enumerate(self.sizes):
+
+            results = []
+
+            for params in survivors:
+
+                key = params_key(params)
+
+                oof, fit_time = self.oof_proba(params, n, X, y, forests[key])
+
+                if round_index == 0:
+                    self.tree_cost[key] = fit_time / n
+
+                score = self.scorer(y, oof)
+                results.append((score, params))
+
+                if best is None or score > best[0]:
+                    best = (score, dict(params, **{RESOURCE: n}), oof)
+
+            results.sort(key=lambda r: r[0], reverse=True)
+
+            print(
+                f"Round {round_index + 1}: {len(results)} settings at "
+                f"{RESOURCE}={n}, best score {results[0][0]:.4f}"
+            )
+
+            # pruned settings are never grown further
+            keep = max(1, len(results) // self.factor)
+            survivors = [params for _, params in results[:keep]]
+
+            forests = {params_key(p): forests[params_key(p)] for p in survivors}
+
+        self.best_score_, self.best_params_, self.oof_proba_ = best
+
+        return self
+
+    # seconds the exhaustive grid would spend fitting (every setting at
+    # every size from scratch, all folds), from the measured per-tree
+    # cost of each setting
+    def grid_cost_estimate(self):
+
+        return sum(self.tree_cost.values()) * sum(self.sizes)
+
+    def grid_fits(self):
+
+        return len(self.candidates) * len(self.sizes) * self.folds
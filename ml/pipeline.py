@@ -0,0 +1,407 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import feature_store
+
+# -----------------------------
+# MODEL PIPELINE
+# the ml scripts as one DAG:
+#
+#   kaggle ─────────────┬──────────────┐
+#   system_features ── system_labels ── merge ── train
+#                                            └── train_lr
+#
+# a stage's key hashes its code, its external inputs (the kaggle
+# CSV, a checksum of the reviews table) and the keys of the stages
+# it depends on. A stage whose key matches the last successful run
+# and whose outputs exist is skipped; independent stages run in
+# parallel. Each stage logs to ml/store/logs/<stage>.log. A stage
+# only writes its own outputs, never another stage's.
+#
+#   python pipeline.py                 everything that is stale
+#   python pipeline.py merge           only up to merge
+#   python pipeline.py --force kaggle  rerun kaggle even if up to date
+#
+# --force does not cascade: downstream stages only rerun when a
+# forced stage's key (i.e. what it was built from) has changed.
+# -----------------------------
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(ML_DIR)
+
+STATE_FILE = os.path.join(feature_store.STORE_DIR, "pipeline_state.json")
+LOG_DIR = os.path.join(feature_store.STORE_DIR, "logs")
+
+KAGGLE_CSV = os.path.join(ML_DIR, "kaggle_data", "fake_reviews_dataset.csv")
+
+
+def reviews_checksum():
+
+    sys.path.append(ROOT_DIR)
+
+    import database
+
+    with database.connection() as db:
+        cursor = db.cursor()
+        cursor.execute("CHECKSUM TABLE reviews")
+        checksum = cursor.fetchone()[1]
+        cursor.close()
+
+    return str(checksum)
+
+
+class Stage:
+
+    # code: files (relative to the repo root) whose content is hashed
+    # inputs: external data files; fingerprints: callables returning a
+    # string that changes when outside data does
+    # outputs: feature store datasets or files (relative to the repo root)
+
+    def __init__(self, name, command, cwd, deps=(), code=(), inputs=(),
+                 fingerprints=(), datasets=(), files=()):
+
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.deps = list(deps)
+        self.code = list(code)
+        self.inputs = list(inputs)
+        self.fingerprints = list(fingerprints)
+        self.datasets = list(datasets)
+        self.files = list(files)
+
+    def key(self, dep_keys):
+
+        h = hashlib.sha1()
+
+        h.update(self.name.encode("utf-8"))
+        h.update(json.dumps(key_args(self.command[1:])).encode("utf-8"))
+
+        for path in self.code + self.inputs:
+            h.update(path.encode("utf-8"))
+            h.update(file_hash(os.path.join(ROOT_DIR, path)).encode("utf-8"))
+
+        for fingerprint in self.fingerprints:
+            h.update(fingerprint().encode("utf-8"))
+
+        for dep in self.deps:
+            h.update(dep_keys[dep].encode("utf-8"))
+
+        return h.hexdigest()
+
+    def missing_inputs(self):
+
+        return [p for p in self.inputs if not os.path.exists(os.path.join(ROOT_DIR, p))]
+
+    def outputs_exist(self):
+
+        return (
+            all(feature_store.exists(name) for name in self.datasets)
+            and all(os.path.exists(os.path.join(ROOT_DIR, path)) for path in self.files)
+        )
+
+
+# options that change how fast a stage runs, not what it produces
+RUNTIME_OPTIONS = {"--workers": 1, "--chunk-size": 1, "--stream": 0}
+
+
+def key_args(args):
+
+    kept = []
+    skip = 0
+
+    for arg in args:
+
+        if skip:
+            skip -= 1
+        elif arg in RUNTIME_OPTIONS:
+            skip = RUNTIME_OPTIONS[arg]
+        else:
+            kept.append(arg)
+
+    return kept
+
+
+_file_hashes = {}
+
+
+def file_hash(path):
+
+    if path not in _file_hashes:
+
+        h = hashlib.sha1()
+
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+
+        _file_hashes[path] = h.hexdigest()
+
+    return _file_hashes[path]
+
+
+def build_stages(args):
+
+    python = sys.executable
+
+    workers = ["--workers", str(args.workers)]
+    builder = ["dataset_builder.py", "--chunk-size", str(args.chunk_size)]
+
+    if args.stream:
+        builder.append("--stream")
+
+    store_code = ["ml/feature_store.py"]
+    feature_code = ["ml/feature_extraction.py", "features.py", "sentiment.py"]
+
+    stages = [
+        Stage(
+            "kaggle",
+            # run from the repo root, like by hand
+            [python, "ml/kaggle_processor.py"] + workers,
+            ROOT_DIR,
+            code=["ml/kaggle_processor.py"] + feature_code + store_code,
+            inputs=[os.path.relpath(KAGGLE_CSV, ROOT_DIR)],
+            datasets=[feature_store.KAGGLE]
+        ),
+        Stage(
+            "system_features",
+            [python] + builder + ["--stage", "features"] + workers,
+            ML_DIR,
+            code=["ml/dataset_builder.py", "duplicates.py"] + feature_code + store_code,
+            fingerprints=[reviews_checksum],
+            datasets=[feature_store.SYSTEM + "_scored"]
+        ),
+        Stage(
+            "system_labels",
+            [python] + builder + ["--stage", "label"],
+            ML_DIR,
+            deps=["system_features", "kaggle"],
+            code=["ml/dataset_builder.py"] + store_code,
+            datasets=[feature_store.SYSTEM]
+        ),
+        Stage(
+            "merge",
+            [python, "merge_datasets.py"],
+            ML_DIR,
+            deps=["system_labels", "kaggle"],
+            code=["ml/merge_datasets.py"] + store_code,
+            datasets=[feature_store.FINAL]
+        ),
+        Stage(
+            "train",
+            [python, "train_final_model.py", "--search", args.search],
+            ML_DIR,
+            deps=["merge"],
+            code=[
+                "ml/train_final_model.py", "ml/param_search.py", "ml/export_forest.py",
+                "forest.py", "registry.py", "scoring.py", "features.py"
+            ] + store_code,
+            files=["model/review_model.pkl"]
+        ),
+        Stage(
+            "train_lr",
+            [python, "train_logistic_model.py"],
+            ML_DIR,
+            deps=["merge"],
+            code=["ml/train_logistic_model.py"] + store_code,
+            files=["model/review_model_lr.pkl"]
+        )
+    ]
+
+    return {stage.name: stage for stage in stages}
+
+
+# targets and everything they depend on, in a valid order
+def select(stages, targets):
+
+    ordered = []
+
+    def visit(name):
+
+        if name in ordered:
+            return
+
+        for dep in stages[name].deps:
+            visit(dep)
+
+        ordered.append(name)
+
+    for name in targets or stages:
+        visit(name)
+
+    return ordered
+
+
+def load_state():
+
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+
+    tmp = STATE_FILE + ".tmp"
+
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+
+    os.replace(tmp, STATE_FILE)
+
+
+def run_stage(stage):
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    log_path = os.path.join(LOG_DIR, stage.name + ".log")
+
+    start = time.perf_counter()
+
+    with open(log_path, "w") as log:
+        result = subprocess.run(stage.command, cwd=stage.cwd, stdout=log, stderr=subprocess.STDOUT)
+
+    return result.returncode, time.perf_counter() - start, log_path
+
+
+def run(stages, order, force, jobs):
+
+    state = load_state()
+
+    keys = {}
+    status = {}
+    timings = {}
+
+    pending = list(order)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+
+        while pending or running:
+
+            # start (or skip) every stage whose dependencies are done
+            for name in list(pending):
+
+                stage = stages[name]
+
+                if any(status.get(dep) in ("failed", "blocked") for dep in stage.deps):
+                    status[name] = "blocked"
+                    pending.remove(name)
+                    continue
+
+                if not all(status.get(dep) in ("ran", "skipped") for dep in stage.deps):
+                    continue
+
+                pending.remove(name)
+
+                missing = stage.missing_inputs()
+
+                # e.g. no kaggle_data/ checkout: keep using what was
+                # built, or what feature_store.load imports from the
+                # committed legacy CSV on first use
+                if missing:
+
+                    for dataset in stage.datasets:
+                        try:
+                            feature_store.load(dataset)
+                        except FileNotFoundError:
+                            pass
+
+                    if stage.outputs_exist():
+                        keys[name] = state.get(name, "")
+                        status[name] = "skipped"
+                        timings[name] = 0.0
+                        print(f"[{name}] {', '.join(missing)} missing, using existing outputs")
+                    else:
+                        status[name] = "failed"
+                        print(f"[{name}] {', '.join(missing)} missing and nothing built or importable")
+
+                    continue
+
+                try:
+                    keys[name] = stage.key(keys)
+                except Exception as e:
+                    print(f"[{name}] cannot hash inputs: {e}")
+                    status[name] = "failed"
+                    continue
+
+                if name not in force and state.get(name) == keys[name] and stage.outputs_exist():
+                    status[name] = "skipped"
+                    timings[name] = 0.0
+                    print(f"[{name}] up to date")
+                    continue
+
+                print(f"[{name}] running: {' '.join(stage.command[1:])}")
+                running[pool.submit(run_stage, stage)] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+
+                name = running.pop(future)
+                returncode, elapsed, log_path = future.result()
+
+                timings[name] = elapsed
+
+                if returncode == 0:
+                    status[name] = "ran"
+                    state[name] = keys[name]
+                    save_state(state)
+                    print(f"[{name}] done in {elapsed:.1f}s")
+
+                else:
+                    status[name] = "failed"
+                    state.pop(name, None)
+                    save_state(state)
+                    print(f"[{name}] FAILED after {elapsed:.1f}s, see {log_path}")
+
+    return status, timings
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run the model pipeline, skipping up-to-date stages")
+    parser.add_argument("targets", nargs="*", help="stages to build (default: all)")
+    parser.add_argument("--force", nargs="*", default=[], help="stages to rerun regardless")
+    parser.add_argument("--jobs", type=int, default=2, help="stages run in parallel")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes per feature extraction stage")
+    parser.add_argument("--stream", action="store_true", help="dataset_builder --stream")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--search", choices=["halving", "grid"], default="halving")
+    args = parser.parse_args()
+
+    stages = build_stages(args)
+
+    unknown = [n for n in args.targets + args.force if n not in stages]
+
+    if unknown:
+        sys.exit(f"unknown stages: {', '.join(unknown)} (known: {', '.join(stages)})")
+
+    order = select(stages, args.targets)
+
+    start = time.perf_counter()
+
+    status, timings = run(stages, order, set(args.force), args.jobs)
+
+    print(f"\n{'stage':<16} {'status':<8} {'seconds':>8}")
+
+    for name in order:
+        print(f"{name:<16} {status.get(name, '-'):<8} {timings.get(name, 0.0):>8.1f}")
+
+    print(f"{'total':<16} {'':<8} {time.perf_counter() - start:>8.1f}")
+
+    if any(s in ("failed", "blocked") for s in status.values()):
+        sys.exit(1)
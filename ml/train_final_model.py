@@ -1,15 +1,39 @@
-import pandas as pd
+import argparse
+import os
+import sys
+import time
 import numpy as np
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, f1_score
+from sklearn.metrics import accuracy_score, classification_report, f1_score
 import joblib
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import feature_store
+from features import FEATURE_COLUMNS
+from param_search import HalvingSearch, CACHE_DIR, FOLDS
+
+# =====================================
+# OPTIONS
+#   --search halving  successive halving, fold results cached on
+#                     disk so reruns resume (default)
+#   --search grid     the original exhaustive GridSearchCV
+# =====================================
+
+parser = argparse.ArgumentParser(description="Train and tune the review model")
+parser.add_argument("--search", choices=["halving", "grid"], default="halving")
+parser.add_argument("--cache-dir", default=CACHE_DIR)
+args = parser.parse_args()
+
+run_start = time.perf_counter()
+
 # =====================================
 # LOAD DATASET
 # =====================================
 
-df = pd.read_csv("final_review_dataset.csv")
+# model columns + label, checked against features.FEATURE_COLUMNS
+df = feature_store.load(feature_store.FINAL).training_frame()
 
 print("Original label values:", df["label"].unique())
 
@@ -22,17 +46,6 @@ print("After binarization:", df["label"].unique())
 # FEATURES
 # =====================================
 
-FEATURE_COLUMNS = [
-    "review_length",
-    "word_count",
-    "sentiment",
-    "rating",
-    "user_review_count",
-    "daily_review_count",
-    "duplicate_flag",
-    "generic_flag"
-]
-
 X = df[FEATURE_COLUMNS]
 y = df["label"]
 
@@ -69,32 +82,60 @@ param_grid = {
 }
 
 # =====================================
-# GRID SEARCH
+# SEARCH
 # =====================================
 
-grid_search = GridSearchCV(
-    estimator=rf,
-    param_grid=param_grid,
-    cv=3,
-    n_jobs=-1,
-    verbose=2
-)
+# same selection metric GridSearchCV uses by default
+def oof_accuracy(y_true, proba):
 
-grid_search.fit(X_train, y_train)
+    return accuracy_score(y_true, proba >= 0.5)
 
-print("\nBest Parameters Found:")
-print(grid_search.best_params_)
 
-best_model = grid_search.best_estimator_
+search = HalvingSearch(rf, param_grid, oof_accuracy, cache_dir=args.cache_dir)
 
-# =====================================
-# PREDICT PROBABILITIES
-# =====================================
+if args.search == "grid":
 
-y_probs = best_model.predict_proba(X_test)[:, 1]
+    grid_search = GridSearchCV(
+        estimator=rf,
+        param_grid=param_grid,
+        cv=FOLDS,
+        n_jobs=-1,
+        verbose=2
+    )
+
+    grid_search.fit(X_train, y_train)
+
+    best_params = grid_search.best_params_
+    best_score = grid_search.best_score_
+
+    # out-of-fold probabilities of the winner, for threshold tuning
+    search.use_data(X_train, y_train)
+
+    oof_proba, _ = search.oof_proba(
+        {k: v for k, v in best_params.items() if k != "n_estimators"},
+        best_params["n_estimators"],
+        X_train,
+        y_train
+    )
+
+else:
+
+    search.fit(X_train, y_train)
+
+    best_params = search.best_params_
+    best_score = search.best_score_
+    oof_proba = search.oof_proba_
+
+print("\nBest Parameters Found:")
+print(best_params)
+
+best_model = rf.set_params(**best_params).fit(X_train, y_train)
 
 # =====================================
 # THRESHOLD TUNING
+# on the out-of-fold probabilities of the whole training set
+# instead of the 20% test split, which now stays untouched for
+# the final report
 # =====================================
 
 thresholds = np.arange(0.30, 0.90, 0.05)
@@ -102,13 +143,13 @@ thresholds = np.arange(0.30, 0.90, 0.05)
 best_threshold = 0
 best_f1 = 0
 
-print("\nThreshold tuning results:\n")
+print("\nThreshold tuning results (out-of-fold):\n")
 
 for t in thresholds:
 
-    y_pred = (y_probs >= t).astype(int)
+    y_pred = (oof_proba >= t).astype(int)
 
-    f1 = f1_score(y_test, y_pred)
+    f1 = f1_score(y_train, y_pred)
 
     print(f"Threshold {t:.2f} → F1 Score: {f1:.4f}")
 
@@ -122,11 +163,31 @@ print("\nBest Threshold:", best_threshold)
 # FINAL PREDICTIONS WITH BEST THRESHOLD
 # =====================================
 
+y_probs = best_model.predict_proba(X_test)[:, 1]
+
 final_pred = (y_probs >= best_threshold).astype(int)
 
+test_f1 = f1_score(y_test, final_pred)
+
 print("\nClassification Report:")
 print(classification_report(y_test, final_pred, zero_division=0))
 
+# =====================================
+# SEARCH COST
+# =====================================
+
+elapsed = time.perf_counter() - run_start
+
+print(f"\nWall clock: {elapsed:.1f}s")
+
+if args.search == "halving":
+
+    grid_estimate = search.grid_cost_estimate()
+
+    print(f"Fold fits run: {search.cache.misses}, reused from cache: {search.cache.hits}")
+    print(f"Exhaustive grid ({search.grid_fits()} fold fits), estimated: {grid_estimate:.1f}s")
+    print(f"Saved: ~{max(grid_estimate - elapsed, 0):.1f}s ({max(1 - elapsed / max(grid_estimate, 1e-9), 0):.0%})")
+
 # =====================================
 # SAVE MODEL + THRESHOLD
 # =====================================
@@ -140,4 +201,41 @@ joblib.dump(
     "../model/review_model.pkl"
 )
 
-print("\nModel trained, tuned, and saved successfully.")
\ No newline at end of file
+print("\nModel trained, tuned, and saved successfully.")
+
+# =====================================
+# COMPACT EXPORT (memory-mapped by the app)
+# =====================================
+
+from export_forest import export, verify
+
+bundle, forest_path, _ = export("../model/review_model.pkl")
+
+verify(bundle, forest_path)
+
+# =====================================
+# PUBLISH TO THE MODEL REGISTRY
+# =====================================
+
+from registry import publish
+
+report = classification_report(y_test, final_pred, zero_division=0, output_dict=True)
+
+version = publish(
+    "../model/review_model.pkl",
+    {
+        "search": args.search,
+        "best_params": best_params,
+        "cv_score": float(best_score),
+        "oof_f1": float(best_f1),
+        "test_f1": float(test_f1),
+        "threshold": float(best_threshold),
+        "precision": float(report["1"]["precision"]),
+        "recall": float(report["1"]["recall"]),
+        "train_rows": int(len(X_train)),
+        "test_rows": int(len(X_test))
+    }
+)
+
+print(f"\nPublished model {version}; serve it with:")
+print(f"  python registry.py promote {version}")
@@ -1,4 +1,3 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
@@ -7,9 +6,9 @@ from sklearn.pipeline import Pipeline
 import joblib
 import os
 
-# ---------------- LOAD DATA ----------------
-df = pd.read_csv("final_review_dataset.csv")
+import feature_store
 
+# ---------------- LOAD DATA ----------------
 FEATURE_COLUMNS = [
     "review_length",
     "word_count",
@@ -21,6 +20,9 @@ FEATURE_COLUMNS = [
     "burst_flag"
 ]
 
+# burst_flag comes from merge_datasets.py
+df = feature_store.load(feature_store.FINAL).frame(FEATURE_COLUMNS + ["label"])
+
 # ---------------- FORCE BINARY LABEL ----------------
 df["label"] = df["label"].astype(int)
 
@@ -1,11 +1,12 @@
-import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
 
+import feature_store
+
 # ---------- LOAD DATA ----------
-df = pd.read_csv("review_dataset.csv")
+df = feature_store.load(feature_store.SYSTEM).training_frame()
 
 # Features and label
 X = df.drop("label", axis=1)
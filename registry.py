@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import joblib
+
+from forest import CompactForest, export_forest, forest_dir, read_meta
+from scoring import load_model, model_file_version
+
+# =========================================================
+# MODEL REGISTRY
+# every published model gets its own directory, named after the
+# sha1 of its pickle (the version stored scores are keyed by):
+#
+#   model/registry/
+#       CURRENT                  version the app serves
+#       <version>/
+#           review_model.pkl
+#           review_model.forest/ compact export (forest.py)
+#           metadata.json        features, threshold, metrics
+#
+# promoting rewrites CURRENT atomically; running apps and workers
+# notice, load the new version in the background and switch.
+# Scores of the old version simply stop matching and are
+# recomputed incrementally (see scoring.fetch_product_reviews).
+#
+#   python registry.py publish model/review_model.pkl
+#   python registry.py promote <version>
+#   python registry.py list
+# =========================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REGISTRY_DIR = os.path.join(BASE_DIR, "model", "registry")
+
+# served until the first version is promoted
+LEGACY_MODEL_PATH = os.path.join(BASE_DIR, "model", "review_model.pkl")
+
+CURRENT_FILE = "CURRENT"
+METADATA_FILE = "metadata.json"
+BUNDLE_FILE = "review_model.pkl"
+
+# slightly safer threshold for real reviews
+MIN_THRESHOLD = 0.50
+
+# how often (seconds) to check CURRENT for a promotion
+SWAP_CHECK_INTERVAL = 10
+
+
+def version_dir(version, root=REGISTRY_DIR):
+
+    return os.path.join(root, version)
+
+
+def read_metadata(version, root=REGISTRY_DIR):
+
+    with open(os.path.join(version_dir(version, root), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def list_versions(root=REGISTRY_DIR):
+
+    if not os.path.isdir(root):
+        return []
+
+    versions = [
+        name for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, METADATA_FILE))
+    ]
+
+    return sorted(versions, key=lambda v: read_metadata(v, root)["created_at"])
+
+
+def current_version(root=REGISTRY_DIR):
+
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# copy a trained bundle into the registry (not yet served)
+
+def publish(model_path, metrics=None, min_threshold=MIN_THRESHOLD, root=REGISTRY_DIR):
+
+    version = model_file_version(model_path)
+
+    path = version_dir(version, root)
+
+    if os.path.exists(os.path.join(path, METADATA_FILE)):
+        return version
+
+    bundle = joblib.load(model_path)
+
+    # built next to the final directory and renamed into place, so a
+    # version directory is either complete or absent
+    staging = path + ".partial"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    shutil.copyfile(model_path, os.path.join(staging, BUNDLE_FILE))
+
+    export_forest(
+        bundle["model"],
+        forest_dir(os.path.join(staging, BUNDLE_FILE)),
+        bundle["threshold"],
+        bundle["features"],
+        version
+    )
+
+    metadata = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": os.path.abspath(model_path),
+        "features": list(bundle["features"]),
+        "trained_threshold": float(bundle["threshold"]),
+        "threshold": max(float(bundle["threshold"]), min_threshold),
+        "metrics": metrics or {}
+    }
+
+    with open(os.path.join(staging, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+
+    return version
+
+
+def promote(version, root=REGISTRY_DIR):
+
+    # refuse versions that are not (completely) published
+    read_metadata(version, root)
+
+    tmp = os.path.join(root, CURRENT_FILE + ".tmp")
+
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+
+def load_version(version, root=REGISTRY_DIR):
+
+    metadata = read_metadata(version, root)
+
+    model_path = os.path.join(version_dir(version, root), BUNDLE_FILE)
+
+    compact = forest_dir(model_path)
+    meta = read_meta(compact)
+
+    if meta and meta["version"] == version:
+        model = CompactForest(compact, model_path)
+    else:
+        model = joblib.load(model_path)["model"]
+
+    return {
+        "model": model,
+        "threshold": metadata["threshold"],
+        "features": metadata["features"],
+        "version": version,
+        "metadata": metadata
+    }
+
+
+class ModelRegistry:
+
+    def __init__(self, root=REGISTRY_DIR, fallback=LEGACY_MODEL_PATH,
+                 check_interval=SWAP_CHECK_INTERVAL):
+
+        self.root = root
+        self.fallback = fallback
+        self.check_interval = check_interval
+
+        self._bundles = {}
+        self._lock = threading.Lock()
+        self._thread_pid = None
+
+        self._legacy_version = None
+
+        self.version = self._resolve()
+
+    def _resolve(self):
+
+        version = current_version(self.root)
+
+        if version:
+            return version
+
+        if self._legacy_version is None:
+            self._legacy_version = model_file_version(self.fallback)
+
+        return self._legacy_version
+
+    def _load(self, version):
+
+        if os.path.exists(os.path.join(version_dir(version, self.root), METADATA_FILE)):
+            return load_version(version, self.root)
+
+        bundle = load_model(self.fallback)
+
+        if bundle["version"] != version:
+            raise KeyError(f"model version {version} is not published")
+
+        return bundle
+
+    # bundle of the given version (default: current), loaded lazily;
+    # callers read .version once and pass it here, so the scores they
+    # store are stamped with the model that produced them
+    def get(self, version=None):
+
+        version = version or self.version
+
+        bundle = self._bundles.get(version)
+
+        if bundle is None:
+            with self._lock:
+                bundle = self._bundles.get(version)
+                if bundle is None:
+                    bundle = self._load(version)
+                    self._bundles[version] = bundle
+
+        return bundle
+
+    # metadata.json of a published version, without loading the model
+    # (empty for the legacy fallback, which has none)
+    def metadata(self, version=None):
+
+        version = version or self.version
+
+        try:
+            return read_metadata(version, self.root)
+        except FileNotFoundError:
+            return {}
+
+    # check for a promotion; the new bundle is loaded before the switch
+    # so no request waits for it (preload=False: only switch version,
+    # for processes that never score themselves)
+    def refresh(self, preload=True):
+
+        try:
+            version = self._resolve()
+        except OSError:
+            return False
+
+        if version == self.version:
+            return False
+
+        bundle = None
+
+        if preload:
+            try:
+                bundle = self._load(version)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"model {version}: not switching ({e})")
+                return False
+
+        with self._lock:
+            # keep the outgoing bundle for requests still using it
+            self._bundles = {
+                v: b for v, b in self._bundles.items() if v == self.version
+            }
+            if bundle is not None:
+                self._bundles[version] = bundle
+            self.version = version
+
+        print(f"model switched to {version}")
+
+        return True
+
+    def _watch(self):
+
+        while True:
+            time.sleep(self.check_interval)
+            self.refresh()
+
+    # background watcher; started per process, so it also runs in
+    # workers forked after import (gunicorn --preload)
+    def start(self):
+
+        if self._thread_pid == os.getpid():
+            return
+
+        self._thread_pid = os.getpid()
+
+        threading.Thread(target=self._watch, name="model-registry", daemon=True).start()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="TrueInsight model registry")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish_cmd = commands.add_parser("publish", help="add a trained bundle")
+    publish_cmd.add_argument("model_path")
+    publish_cmd.add_argument("--metrics", help="JSON file with training metrics")
+    publish_cmd.add_argument("--min-threshold", type=float, default=MIN_THRESHOLD)
+    publish_cmd.add_argument("--promote", action="store_true")
+
+    promote_cmd = commands.add_parser("promote", help="serve a published version")
+    promote_cmd.add_argument("version")
+
+    commands.add_parser("list", help="show published versions")
+
+    args = parser.parse_args()
+
+    if args.command == "publish":
+
+        metrics = None
+        if args.metrics:
+            with open(args.metrics) as f:
+                metrics = json.load(f)
+
+        version = publish(args.model_path, metrics, args.min_threshold)
+        print(f"published {version}")
+
+        if args.promote:
+            promote(version)
+            print(f"promoted {version}")
+
+    elif args.command == "promote":
+
+        promote(args.version)
+        print(f"promoted {args.version}")
+
+    else:
+
+        current = current_version()
+
+        for version in list_versions():
+            metadata = read_metadata(version)
+            marker = "*" if version == current else " "
+            print(
+                f"{marker} {version}  {metadata['created_at']}  "
+                f"threshold {metadata['threshold']:.2f}  {json.dumps(metadata['metrics'])}"
+            )
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# =========================================================
+# CATEGORY RELEVANCE RULES
+# relevance_rules.json maps a category to keywords that do not
+# belong in its reviews ("battery" in a sunscreen review).
+# Each category compiles to one word-boundary regex; the file is
+# re-read when it changes, so rules can be edited without a restart.
+# =========================================================
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "relevance_rules.json")
+
+# how often (seconds) to stat the rules file for changes
+RELOAD_CHECK_INTERVAL = 5
+
+
+def compile_rules(rules):
+
+    compiled = {}
+
+    for category, keywords in rules.items():
+
+        keywords = sorted({k.strip().lower() for k in keywords if k.strip()}, key=len, reverse=True)
+
+        if not keywords:
+            continue
+
+        # whole words only, allowing a plural ("cameras", "soles")
+        alternation = "|".join(re.escape(k) for k in keywords)
+
+        compiled[category.strip().lower()] = re.compile(
+            rf"\b(?:{alternation})(?:s|es)?\b",
+            re.IGNORECASE
+        )
+
+    return compiled
+
+
+class RelevanceRules:
+
+    def __init__(self, path=RULES_PATH, check_interval=RELOAD_CHECK_INTERVAL):
+
+        self.path = path
+        self.check_interval = check_interval
+
+        self.version = None
+        self._patterns = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+        self.reload()
+
+    def reload(self):
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+
+        patterns = compile_rules(json.loads(raw))
+
+        with self._lock:
+            self._patterns = patterns
+            self._mtime = os.path.getmtime(self.path)
+            self.version = hashlib.sha1(raw).hexdigest()[:8]
+
+    def reload_if_changed(self):
+
+        now = time.monotonic()
+
+        if now < self._next_check:
+            return
+
+        self._next_check = now + self.check_interval
+
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+
+        if mtime != self._mtime:
+            try:
+                self.reload()
+            except (OSError, ValueError):
+                # half-written or broken file: keep serving the old rules
+                pass
+
+    def classify(self, texts, category):
+
+        self.reload_if_changed()
+
+        pattern = self._patterns.get((category or "").lower())
+
+        if pattern is None:
+            return [True] * len(texts)
+
+        search = pattern.search
+
+        return [search(text) is None for text in texts]
+
+    def is_relevant(self, text, category):
+
+        return self.classify([text], category)[0]
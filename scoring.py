@@ -0,0 +1,526 @@
+import hashlib
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+import metrics
+from duplicates import fetch_duplicate_flags, NEAR
+from forest import CompactForest, forest_dir, read_meta
+from features import fetch_user_activity, activity_for
+from sentiment import polarities
+
+# =========================================================
+# MODEL VERSION
+# scores are stored per model version, so a retrained
+# review_model.pkl automatically marks old scores as stale
+# =========================================================
+
+def model_file_version(path):
+
+    h = hashlib.sha1()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+    return h.hexdigest()[:12]
+
+
+# prefers the memory-mapped export (ml/export_forest.py) when it was
+# made from this exact pickle; otherwise unpickles the sklearn model
+
+def load_model(path):
+
+    version = model_file_version(path)
+
+    compact = forest_dir(path)
+    meta = read_meta(compact)
+
+    if meta and meta["version"] == version:
+        model = CompactForest(compact, path)
+        threshold = meta["threshold"]
+        features = meta["features"]
+
+    else:
+        bundle = joblib.load(path)
+        model = bundle["model"]
+        threshold = bundle["threshold"]
+        features = bundle["features"]
+
+    return {
+        "model": model,
+        # slightly safer threshold for real reviews
+        "threshold": max(threshold, 0.50),
+        "features": features,
+        "version": version
+    }
+
+
+# stored scores depend on both the model and the relevance rules,
+# so editing the rules makes existing scores stale as well
+
+def score_version(model_version, rules):
+
+    rules.reload_if_changed()
+
+    return f"{model_version}.{rules.version}"
+
+
+# =========================================================
+# ML REVIEW ANALYSIS
+# pure functions (no DB), so they also run in worker processes
+# =========================================================
+
+IRRELEVANT_REASON = "Irrelevant to product specifications"
+
+# activity: (user_counts, daily_counts) from features.fetch_user_activity
+# duplicates: {review_id: EXACT | NEAR | None} from duplicates.fetch_duplicate_flags
+
+def analyze_reviews(reviews, activity, duplicates, model, threshold):
+
+    if not reviews:
+        return []
+
+    user_counts, daily_counts = activity
+
+    rows = []
+
+    with metrics.span("sentiment"):
+        sentiments = polarities([r["text"] for r in reviews])
+
+    for r, sentiment in zip(reviews, sentiments):
+
+        text = r["text"]
+        rating = r["rating"]
+        created_at = r["created_at"]
+        user_id = r["user_id"]
+
+        # -------- FEATURE EXTRACTION --------
+
+        review_length = len(text)
+        word_count = len(text.split())
+
+        user_review_count, daily_review_count = activity_for(
+            user_counts, daily_counts, user_id, created_at
+        )
+
+        duplicate_flag = 1 if duplicates.get(r["id"]) else 0
+
+        generic_flag = 1 if text.lower().strip() in [
+            "good","nice","excellent","very good"
+        ] else 0
+
+        # -------- FEATURE VECTOR --------
+
+        rows.append([
+            review_length,
+            word_count,
+            sentiment,
+            rating,
+            user_review_count,
+            daily_review_count,
+            duplicate_flag,
+            generic_flag
+        ])
+
+    # -------- ML PREDICTION (one call for the whole batch) --------
+
+    features = np.array(rows, dtype=np.float64)
+
+    with metrics.span("inference", metrics.INFERENCE_SECONDS):
+        prob_fake = model.predict_proba(features)[:, 1]
+
+    metrics.INFERENCE_BATCH.observe(len(rows))
+
+    # -------- REASONS --------
+
+    analyzed = []
+
+    for r, row, p in zip(reviews, rows, prob_fake):
+
+        duplicate_flag, generic_flag = row[6], row[7]
+        user_review_count = row[4]
+
+        reasons = []
+
+        if duplicates.get(r["id"]) == NEAR:
+            reasons.append("Near-duplicate review text")
+        elif duplicate_flag:
+            reasons.append("Duplicate review text")
+
+        if generic_flag:
+            reasons.append("Generic review")
+
+        if user_review_count <= 1:
+            reasons.append("Low reviewer activity")
+
+        analyzed.append({
+            "id": r.get("id"),
+            "rating": r["rating"],
+            "text": r["text"],
+            "created_at": r["created_at"],
+            "prob_fake": float(p),
+            "suspicious": bool(p >= threshold),
+            "reasons": ", ".join(reasons) if reasons else "Predicted by ML model"
+        })
+
+    return analyzed
+
+
+# score the reviews of one product that have no stored score yet
+
+def score_unscored(reviews, category, activity, duplicates, model, threshold, rules):
+
+    unscored = [r for r in reviews if r["suspicious"] is None]
+
+    if not unscored:
+        return []
+
+    relevant_reviews = []
+    scored = []
+
+    with metrics.span("relevance"):
+        relevant = rules.classify([r["text"] for r in unscored], category)
+
+    for r, is_relevant in zip(unscored, relevant):
+
+        if not is_relevant:
+
+            scored.append({
+                "id": r["id"],
+                "rating": r["rating"],
+                "suspicious": True,
+                "reasons": IRRELEVANT_REASON
+            })
+
+        else:
+
+            relevant_reviews.append(r)
+
+    scored.extend(analyze_reviews(relevant_reviews, activity, duplicates, model, threshold))
+
+    return scored
+
+
+def apply_scores(reviews, scored):
+
+    by_id = {s["id"]: s for s in scored}
+
+    for r in reviews:
+        if r["id"] in by_id:
+            r["suspicious"] = by_id[r["id"]]["suspicious"]
+            r["reasons"] = by_id[r["id"]]["reasons"]
+
+
+# DB-side inputs for scoring the unscored reviews of a product:
+# reviewer activity and corpus-wide duplicate flags. May index new
+# reviews for duplicate detection, so the caller commits.
+
+def fetch_scoring_inputs(cur, reviews):
+
+    unscored = [r for r in reviews if r["suspicious"] is None]
+
+    activity = fetch_user_activity(cur, unscored)
+
+    duplicates = fetch_duplicate_flags(cur, unscored)
+
+    return activity, duplicates
+
+
+# =========================================================
+# REVIEW SCORE STORE (review_scores table)
+# =========================================================
+
+def _review_row(row):
+
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "rating": row[2],
+        "text": row[3],
+        "created_at": row[4],
+        "suspicious": None if row[5] is None else bool(row[5]),
+        "reasons": row[6]
+    }
+
+
+# every review of a product, with its stored score for model_version
+# (suspicious/reasons are None when the review has not been scored yet)
+
+def fetch_product_reviews(cur, product_id, model_version):
+
+    cur.execute("""
+        SELECT r.id, r.user_id, r.rating, r.review_text, r.created_at,
+               s.suspicious, s.reasons
+        FROM reviews r
+        LEFT JOIN review_scores s
+               ON s.review_id = r.id AND s.model_version = %s
+        WHERE r.product_id = %s
+        ORDER BY r.created_at DESC, r.id DESC
+    """, (model_version, product_id))
+
+    return [_review_row(row) for row in cur.fetchall()]
+
+
+# scored: list of dicts with id, suspicious, reasons and optional prob_fake
+
+def save_scores(cur, scored, model_version):
+
+    if not scored:
+        return
+
+    now = datetime.now()
+
+    cur.executemany("""
+        INSERT INTO review_scores
+            (review_id, model_version, prob_fake, suspicious, reasons, scored_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            prob_fake = VALUES(prob_fake),
+            suspicious = VALUES(suspicious),
+            reasons = VALUES(reasons),
+            scored_at = VALUES(scored_at)
+    """, [
+        (
+            s["id"],
+            model_version,
+            s.get("prob_fake"),
+            1 if s["suspicious"] else 0,
+            s["reasons"],
+            now
+        )
+        for s in scored
+    ])
+
+
+# =========================================================
+# REVIEW PAGES (keyset pagination, newest first)
+# a page continues after the (created_at, id) of the previous page's
+# last review, so page N costs the same as page 1 (no OFFSET) and
+# reviews inserted meanwhile never shift or repeat entries.
+# =========================================================
+
+REVIEW_PAGE_SIZE = 20
+MAX_REVIEW_PAGE_SIZE = 100
+
+
+def encode_cursor(review):
+
+    return f"{review['created_at'].isoformat()}_{review['id']}"
+
+
+# ValueError for anything that is not a cursor from encode_cursor
+def decode_cursor(value):
+
+    created_at, _, review_id = value.rpartition("_")
+
+    return datetime.fromisoformat(created_at), int(review_id)
+
+
+# one page of a product's reviews with their stored scores, and the
+# cursor of the next page (None on the last page)
+
+def fetch_review_page(cur, product_id, model_version, before=None, limit=REVIEW_PAGE_SIZE):
+
+    keyset = ""
+    params = [model_version, product_id]
+
+    if before is not None:
+        # spelled out instead of (created_at, id) < (%s, %s) so MySQL
+        # turns it into a range on (product_id, created_at, id)
+        keyset = "AND (r.created_at < %s OR (r.created_at = %s AND r.id < %s))"
+        params += [before[0], before[0], before[1]]
+
+    # one extra row tells whether there is a next page
+    cur.execute(f"""
+        SELECT r.id, r.user_id, r.rating, r.review_text, r.created_at,
+               s.suspicious, s.reasons
+        FROM reviews r
+        LEFT JOIN review_scores s
+               ON s.review_id = r.id AND s.model_version = %s
+        WHERE r.product_id = %s {keyset}
+        ORDER BY r.created_at DESC, r.id DESC
+        LIMIT %s
+    """, (*params, limit + 1))
+
+    reviews = [_review_row(row) for row in cur.fetchall()]
+
+    if len(reviews) > limit:
+        return reviews[:limit], encode_cursor(reviews[limit - 1])
+
+    return reviews, None
+
+
+# =========================================================
+# PER-PRODUCT INTEGRITY AGGREGATES (product_integrity table)
+# the row for a product counts exactly the reviews scored with
+# its model_version; newly scored reviews are added as deltas and
+# the first batch scored with a new version replaces the row
+# =========================================================
+
+# save newly scored reviews of one product and fold them into the
+# product's aggregate; scored dicts also need "rating". The caller
+# commits. Locking the aggregate row serializes concurrent scorers of
+# the same product, and the "already scored" check is a locking read
+# too: a plain SELECT would read the caller's snapshot (taken at its
+# first query, e.g. the review page) and miss scores committed by the
+# scorer that held the lock before, counting those reviews twice.
+
+def record_scores(cur, product_id, scored, model_version):
+
+    if not scored:
+        return
+
+    cur.execute("""
+        INSERT IGNORE INTO product_integrity (product_id, model_version, updated_at)
+        VALUES (%s, %s, %s)
+    """, (product_id, model_version, datetime.now()))
+
+    cur.execute(
+        "SELECT model_version FROM product_integrity WHERE product_id=%s FOR UPDATE",
+        (product_id,)
+    )
+    current_version = cur.fetchone()[0]
+
+    # someone else may have scored part of this batch meanwhile;
+    # FOR UPDATE reads the latest committed rows, not the snapshot
+    placeholders = ",".join(["%s"] * len(scored))
+
+    cur.execute(f"""
+        SELECT review_id FROM review_scores
+        WHERE model_version = %s AND review_id IN ({placeholders})
+        FOR UPDATE
+    """, (model_version, *[s["id"] for s in scored]))
+
+    already = {row[0] for row in cur.fetchall()}
+
+    fresh = [s for s in scored if s["id"] not in already]
+
+    if not fresh:
+        return
+
+    save_scores(cur, fresh, model_version)
+
+    genuine = [s for s in fresh if not s["suspicious"]]
+
+    deltas = (
+        len(fresh),
+        len(genuine),
+        sum(s["rating"] for s in fresh),
+        sum(s["rating"] for s in genuine)
+    )
+
+    if current_version == model_version:
+
+        cur.execute("""
+            UPDATE product_integrity
+            SET total = total + %s,
+                genuine = genuine + %s,
+                rating_sum = rating_sum + %s,
+                genuine_rating_sum = genuine_rating_sum + %s,
+                updated_at = %s
+            WHERE product_id = %s
+        """, (*deltas, datetime.now(), product_id))
+
+    else:
+
+        cur.execute("""
+            UPDATE product_integrity
+            SET total = %s,
+                genuine = %s,
+                rating_sum = %s,
+                genuine_rating_sum = %s,
+                model_version = %s,
+                updated_at = %s
+            WHERE product_id = %s
+        """, (*deltas, model_version, datetime.now(), product_id))
+
+    sync_product_ratings(cur, product_id)
+
+
+# the catalog (catalog.py) sorts on copies of the aggregate's ratings
+# in products; refreshed whenever the aggregate changes. Same rule as
+# the pages: the review rating falls back to the listed raw_rating
+# until something is scored, 0 means no filtered rating yet. An
+# aggregate that does not count every review yet (the first pages
+# scored after a promotion, see products.review_count) leaves the
+# previous copies in place.
+
+def sync_product_ratings(cur, product_id):
+
+    cur.execute("""
+        UPDATE products p
+        LEFT JOIN product_integrity i ON i.product_id = p.id
+        SET p.review_rating = IF(i.total > 0, ROUND(i.rating_sum / i.total, 2), COALESCE(p.raw_rating, 0)),
+            p.filtered_rating = IF(i.genuine > 0, ROUND(i.genuine_rating_sum / i.genuine, 2), 0)
+        WHERE p.id = %s
+          AND (i.product_id IS NULL OR i.total = p.review_count)
+    """, (product_id,))
+
+
+def integrity_summary(total, genuine, rating_sum, genuine_rating_sum):
+
+    total = total or 0
+    genuine = genuine or 0
+
+    return {
+        "total": total,
+        "genuine": genuine,
+        "suspicious": total - genuine,
+        "raw_rating": round(rating_sum / total, 2) if total else 0,
+        "filtered_rating": round(genuine_rating_sum / genuine, 2) if genuine else None
+    }
+
+
+# the summary plus "model_version": the version the aggregate counts
+# (None when the product has no aggregate yet) and "review_count":
+# the product's reviews, scored or not (products.review_count)
+
+def fetch_product_integrity(cur, product_id):
+
+    cur.execute("""
+        SELECT i.total, i.genuine, i.rating_sum, i.genuine_rating_sum,
+               i.model_version, p.review_count
+        FROM products p
+        LEFT JOIN product_integrity i ON i.product_id = p.id
+        WHERE p.id = %s
+    """, (product_id,))
+
+    row = cur.fetchone()
+
+    if not row:
+        return dict(integrity_summary(0, 0, 0, 0), model_version=None, review_count=0)
+
+    return dict(integrity_summary(*row[:4]), model_version=row[4], review_count=row[5])
+
+
+# full recount of one product's aggregate from review_scores; used to
+# seed rows for reviews scored before the aggregate existed and to heal
+# drift (e.g. deleted reviews), products.review_count included. Caller
+# commits.
+
+def rebuild_product_integrity(cur, product_id, model_version):
+
+    cur.execute("""
+        UPDATE products
+        SET review_count = (SELECT COUNT(*) FROM reviews WHERE product_id = %s)
+        WHERE id = %s
+    """, (product_id, product_id))
+
+    cur.execute("DELETE FROM product_integrity WHERE product_id = %s", (product_id,))
+
+    cur.execute("""
+        INSERT INTO product_integrity
+            (product_id, model_version, total, genuine,
+             rating_sum, genuine_rating_sum, updated_at)
+        SELECT r.product_id, %s, COUNT(*), SUM(s.suspicious = 0),
+               SUM(r.rating), SUM(IF(s.suspicious = 0, r.rating, 0)), %s
+        FROM reviews r
+        JOIN review_scores s
+          ON s.review_id = r.id AND s.model_version = %s
+        WHERE r.product_id = %s
+        GROUP BY r.product_id
+    """, (model_version, datetime.now(), model_version, product_id))
+
+    sync_product_ratings(cur, product_id)
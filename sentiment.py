@@ -0,0 +1,251 @@
+import re
+from functools import lru_cache
+
+from textblob.en import sentiment as _pattern_lexicon
+from textblob._text import (
+    PUNCTUATION,
+    ABBREVIATIONS,
+    RE_ABBR1,
+    RE_ABBR2,
+    RE_ABBR3,
+    EMOTICONS,
+    RE_EMOTICONS,
+    RE_SARCASM,
+    replacements as CONTRACTIONS,
+    EOS
+)
+
+# =========================================================
+# FAST SENTIMENT POLARITY
+# same scores as TextBlob(text).sentiment.polarity (pattern
+# analyzer) without building a TextBlob per review:
+#   - the en-sentiment.xml lexicon is compiled once into a flat
+#     word -> (polarity, intensity, is_modifier) table
+#   - tokenization is pattern's find_tokens with plain str
+#     operations instead of per-call regex substitutions
+#   - repeated texts are memoized, batches are deduplicated
+# check with ml/check_sentiment.py after upgrading textblob
+# =========================================================
+
+NEGATIONS = ("no", "not", "n't", "never")
+
+MEMO_SIZE = 65536
+
+_LEADING = tuple(PUNCTUATION.replace(".", ""))
+_TRAILING = _LEADING + (".",)
+
+_QUOTES = (
+    ("“", " “ "),
+    ("”", " ” "),
+    ("‘", " ‘ "),
+    ("’", " ’ "),
+    ("'", " ' "),
+    ('"', ' " ')
+)
+
+_LINEBREAK = re.compile(r"\n{2,}")
+_WHITESPACE = re.compile(r"\s+")
+
+_SENTENCE_END = ("...", ".", "!", "?", EOS)
+_SENTENCE_TAIL = ("'", '"', "”", "’", "...", ".", "!", "?", ")", EOS)
+
+_lexicon = None
+_emoticons = None
+
+
+def _compile_lexicon():
+
+    global _lexicon, _emoticons
+
+    # lazydict: first len() parses the xml (+ the "-ly" adverb rules)
+    len(_pattern_lexicon)
+
+    table = {}
+
+    for word, senses in dict.items(_pattern_lexicon):
+        p, s, i = senses[None]
+        table[word] = (p, i, "RB" in senses)
+
+    emoticons = {}
+
+    # first matching mood wins, like pattern's scan over EMOTICONS
+    for (_, p), faces in EMOTICONS.items():
+        for face in faces:
+            emoticons.setdefault(face.lower(), p)
+
+    _lexicon, _emoticons = table, emoticons
+
+
+# =========================================================
+# TOKENIZER
+# =========================================================
+
+def _join_emoticon(m):
+
+    return m.group(1).replace(" ", "") + m.group(2)
+
+
+def tokenize(text):
+
+    for a, b in CONTRACTIONS.items():
+        if a in text:
+            text = text.replace(a, b)
+
+    for a, b in _QUOTES:
+        if a in text:
+            text = text.replace(a, b)
+
+    text = text.replace("\r\n", "\n")
+    text = _LINEBREAK.sub(" %s " % EOS, text)
+    text = _WHITESPACE.sub(" ", text)
+
+    tokens = []
+
+    for t in text.split(" "):
+
+        if not t:
+            continue
+
+        tail = []
+
+        while t.startswith(_LEADING) and t not in CONTRACTIONS:
+            tokens.append(t[0])
+            t = t[1:]
+
+        while t.endswith(_TRAILING) and t not in CONTRACTIONS:
+
+            if t.endswith(_LEADING):
+                tail.append(t[-1])
+                t = t[:-1]
+
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+
+            if t.endswith("."):
+                if (
+                    t in ABBREVIATIONS
+                    or RE_ABBR1.match(t) is not None
+                    or RE_ABBR2.match(t) is not None
+                    or RE_ABBR3.match(t) is not None
+                ):
+                    break
+                tail.append(t[-1])
+                t = t[:-1]
+
+        if t != "":
+            tokens.append(t)
+
+        tokens.extend(reversed(tail))
+
+    # sentences matter only as the scope of the emoticon/sarcasm rules
+    sentences, i, j = [[]], 0, 0
+
+    while j < len(tokens):
+        if tokens[j] in _SENTENCE_END:
+            while j < len(tokens) and tokens[j] in _SENTENCE_TAIL:
+                if tokens[j] in ("'", '"') and sentences[-1].count(tokens[j]) % 2 == 0:
+                    break
+                j += 1
+            sentences[-1].extend(t for t in tokens[i:j] if t != EOS)
+            sentences.append([])
+            i = j
+        j += 1
+
+    sentences[-1].extend(tokens[i:j])
+
+    words = []
+
+    for sentence in sentences:
+        if sentence:
+            text = RE_SARCASM.sub("(!)", " ".join(sentence))
+            text = RE_EMOTICONS.sub(_join_emoticon, text)
+            words.extend(text.lower().split())
+
+    return words
+
+
+# =========================================================
+# POLARITY
+# =========================================================
+
+def _score(words):
+
+    if _lexicon is None:
+        _compile_lexicon()
+
+    lexicon = _lexicon
+
+    # each assessment: [polarity, intensity, negated]
+    a = []
+    m = None  # preceding modifier ("really good")
+    n = None  # preceding negation ("not good")
+
+    for w in words:
+
+        entry = lexicon.get(w)
+
+        if entry is not None:
+
+            p, i, is_modifier = entry
+
+            if m is None:
+                a.append([p, i, False])
+            else:
+                a[-1][0] = max(-1.0, min(p * a[-1][1], +1.0))
+                a[-1][1] = i
+
+            if n is not None:
+                a[-1][1] = 1.0 / a[-1][1]
+                a[-1][2] = True
+
+            m = w if is_modifier else None
+            n = w if w in NEGATIONS else None
+
+        else:
+
+            if w in NEGATIONS:
+                n = w
+            elif n and len(w.strip("'")) > 1:
+                n = None
+
+            if n is not None and m is not None and m.endswith("ly"):
+                a[-1][2] = True
+                n = None
+            elif m and len(w) > 2:
+                m = None
+
+            if w == "!" and a:
+                a[-1][0] = max(-1.0, min(a[-1][0] * 1.25, +1.0))
+
+            if w == "(!)":
+                a.append([0.0, 1.0, False])
+
+            if w.isalpha() is False and len(w) <= 5 and w not in PUNCTUATION:
+                p = _emoticons.get(w)
+                if p is not None:
+                    a.append([p, 1.0, False])
+
+    total = 0
+    for p, _, negated in a:
+        total += p * -0.5 if negated else p
+
+    return total / float(len(a) or 1)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def polarity(text):
+
+    return _score(tokenize(text))
+
+
+def polarities(texts):
+
+    # duplicates inside the batch are scored once
+    scores = {}
+
+    for text in texts:
+        if text not in scores:
+            scores[text] = polarity(text)
+
+    return [scores[text] for text in texts]
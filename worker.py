@@ -0,0 +1,283 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import database
+import jobs
+from registry import ModelRegistry
+from relevance import RelevanceRules
+from scoring import (
+    score_version,
+    score_unscored,
+    fetch_scoring_inputs,
+    fetch_product_reviews,
+    record_scores,
+    fetch_product_integrity,
+    rebuild_product_integrity
+)
+
+# =========================================================
+# BACKGROUND SCORING WORKER
+# consumes scoring_jobs, scores the affected products' new
+# reviews in a process pool and writes results to review_scores
+# / product_integrity, so pages only read precomputed scores.
+#
+#   python worker.py --processes 4
+#
+# run the web app with SCORING_MODE=worker alongside it
+# =========================================================
+
+POLL_INTERVAL = 2       # seconds to sleep when the queue is empty
+BATCH_SIZE = 32         # jobs claimed per round
+STALE_AFTER = 600       # seconds before a 'running' job is considered lost
+
+
+# =========================================================
+# POOL PROCESSES
+# each process loads the bundle and rules once; the pool is
+# replaced when another model version is promoted
+# =========================================================
+
+_bundle = None
+_rules = None
+
+
+def _init_process(model_version):
+
+    global _bundle, _rules
+
+    _bundle = ModelRegistry().get(model_version)
+    _rules = RelevanceRules()
+
+
+def _score_product(reviews, category, activity, duplicates):
+
+    return score_unscored(
+        reviews, category, activity, duplicates,
+        _bundle["model"], _bundle["threshold"], _rules
+    )
+
+
+# =========================================================
+# MAIN LOOP
+# =========================================================
+
+def run_round(conn, pool, rules, model_version):
+
+    claimed = jobs.claim(conn, BATCH_SIZE)
+
+    if not claimed:
+        return 0
+
+    # several jobs for the same product collapse into one scoring pass
+    job_ids = {}
+    for job_id, product_id in claimed:
+        job_ids.setdefault(product_id, []).append(job_id)
+
+    version = score_version(model_version, rules)
+
+    cur = conn.cursor()
+
+    futures = {}
+    review_counts = {}
+
+    # the jobs are committed as 'running' by now: whatever fails for
+    # one product fails its jobs, so none is left running
+    for product_id in job_ids:
+
+        try:
+            cur.execute("SELECT category FROM products WHERE id=%s", (product_id,))
+            row = cur.fetchone()
+
+            if not row:
+                jobs.finish(cur, job_ids[product_id])
+                conn.commit()
+                continue
+
+            reviews = fetch_product_reviews(cur, product_id, version)
+            activity, duplicates = fetch_scoring_inputs(cur, reviews)
+
+            # new reviews indexed for duplicate detection
+            conn.commit()
+
+            # only the unscored reviews travel to the pool process
+            unscored = [r for r in reviews if r["suspicious"] is None]
+
+            futures[product_id] = pool.submit(
+                _score_product, unscored, row[0], activity, duplicates
+            )
+
+        except Exception as e:
+            conn.rollback()
+            jobs.fail(cur, job_ids[product_id], e)
+            conn.commit()
+
+            print(f"product {product_id}: failed ({e})")
+            continue
+
+        review_counts[product_id] = len(reviews)
+
+    for product_id, future in futures.items():
+
+        try:
+            scored = future.result()
+            record_scores(cur, product_id, scored, version)
+
+            # every review is scored now: the product page trusts the
+            # aggregate and products.review_count, so heal drift
+            # (deleted reviews) here
+            integrity = fetch_product_integrity(cur, product_id)
+
+            counts = {review_counts[product_id], integrity["total"], integrity["review_count"]}
+
+            if len(counts) > 1:
+                rebuild_product_integrity(cur, product_id, version)
+
+            jobs.finish(cur, job_ids[product_id])
+            conn.commit()
+
+            print(f"product {product_id}: scored {len(scored)} reviews")
+
+        except Exception as e:
+            conn.rollback()
+            jobs.fail(cur, job_ids[product_id], e)
+            conn.commit()
+
+            print(f"product {product_id}: failed ({e})")
+
+    cur.close()
+
+    return len(claimed)
+
+
+# =========================================================
+# IN-APP SCORING (SCORING_MODE=inline)
+# bulk ingestion (ingest.py) queues jobs in both modes; with no
+# worker.py running, the app wakes this thread instead. It drains
+# the queue through run_round with the app's already loaded model,
+# scoring in the thread itself rather than in a process pool.
+# =========================================================
+
+class _InlinePool:
+
+    def submit(self, fn, *args):
+
+        future = Future()
+
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+
+class BackgroundScorer:
+
+    def __init__(self, models, rules):
+
+        self.models = models
+        self.rules = rules
+
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="background-scorer", daemon=True
+                )
+                self._thread.start()
+
+        self._wake.set()
+
+    def _run(self):
+
+        global _bundle, _rules
+
+        while True:
+
+            self._wake.wait()
+            self._wake.clear()
+
+            try:
+                model_version = self.models.version
+
+                # this thread is the only user of the module globals
+                # in the app process
+                _bundle = self.models.get(model_version)
+                _rules = self.rules
+
+                # a pooled connection, held only while there is work
+                with database.connection() as conn:
+
+                    # jobs left 'running' by a crash, as in main()
+                    cur = conn.cursor()
+                    requeued = jobs.requeue_stale(cur, STALE_AFTER)
+                    conn.commit()
+                    cur.close()
+
+                    if requeued:
+                        print(f"requeued {requeued} stale jobs")
+
+                    while run_round(conn, _InlinePool(), self.rules, model_version):
+                        pass
+
+            except Exception as e:
+                print(f"background scoring failed: {e}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="TrueInsight scoring worker")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+    args = parser.parse_args()
+
+    conn = database.connect()
+
+    rules = RelevanceRules()
+    models = ModelRegistry()
+
+    cur = conn.cursor()
+    requeued = jobs.requeue_stale(cur, STALE_AFTER)
+    conn.commit()
+    cur.close()
+
+    if requeued:
+        print(f"requeued {requeued} stale jobs")
+
+    while True:
+
+        model_version = models.version
+
+        print(f"worker started: {args.processes} processes, model {model_version}")
+
+        with ProcessPoolExecutor(
+            max_workers=args.processes,
+            initializer=_init_process,
+            initargs=(model_version,)
+        ) as pool:
+
+            while models.version == model_version:
+
+                done = run_round(conn, pool, rules, model_version)
+
+                if not done:
+                    if args.once:
+                        return
+                    time.sleep(POLL_INTERVAL)
+
+                # the parent never loads the model; the pool processes
+                # of the next version do
+                if models.refresh(preload=False):
+                    print(f"model {models.version} promoted, restarting pool")
+
+
+if __name__ == "__main__":
+    main()